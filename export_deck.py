@@ -0,0 +1,481 @@
+"""Export the whole MICROCASA deck to a static, self-contained HTML bundle.
+
+Every slide_* function is rendered headlessly (in parallel, one process per
+slide) against a small recorder that stands in for Streamlit. Plotly figures
+are embedded as JSON, the pipeline graph as pre-rendered SVG, and the CSS and
+plotly.js are inlined, so the bundle can be served from any CDN:
+
+    python export_deck.py --out dist --telemetry telemetry.csv.gz
+"""
+import argparse
+import gzip
+import html
+import json
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import textwrap
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+import graphviz
+import pandas as pd
+
+# ==============================================================================
+# 1. HEADLESS STREAMLIT RECORDER
+# ==============================================================================
+
+INLINE_RULES = [
+    (re.compile(r"`([^`]+)`"), r"<code>\1</code>"),
+    (re.compile(r"\*\*(.+?)\*\*"), r"<strong>\1</strong>"),
+    (re.compile(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])"), r"<em>\1</em>"),
+    (re.compile(r"\[([^\]]+)\]\(([^)]+)\)"), r'<a href="\2">\1</a>'),
+]
+
+
+def inline_md(text):
+    for pattern, repl in INLINE_RULES:
+        text = pattern.sub(repl, text)
+    return text
+
+
+def md_to_html(text):
+    """Just enough Markdown for the slides: headings, lists, rules, paragraphs, raw HTML"""
+    out, para, list_tag, in_html = [], [], None, False
+
+    def close_blocks():
+        nonlocal para, list_tag
+        if para:
+            out.append(f"<p>{inline_md(' '.join(para))}</p>")
+            para = []
+        if list_tag:
+            out.append(f"</{list_tag}>")
+            list_tag = None
+
+    for line in textwrap.dedent(str(text)).strip("\n").split("\n"):
+        s = line.strip()
+        if not s:
+            close_blocks()
+            in_html = False
+            continue
+        if in_html or s.startswith("<"):
+            close_blocks()
+            in_html = True
+            out.append(line)
+            continue
+        heading = re.match(r"(#{1,6})\s+(.*)", s)
+        item = re.match(r"(?:[*-]|(\d+)\.)\s+(.*)", s)
+        if heading:
+            close_blocks()
+            level = len(heading.group(1))
+            out.append(f"<h{level}>{inline_md(heading.group(2))}</h{level}>")
+        elif s in ("---", "***"):
+            close_blocks()
+            out.append("<hr>")
+        elif item:
+            tag = "ol" if item.group(1) else "ul"
+            if para or list_tag != tag:
+                close_blocks()
+                out.append(f"<{tag}>")
+                list_tag = tag
+            out.append(f"<li>{inline_md(item.group(2))}</li>")
+        else:
+            para.append(s)
+    close_blocks()
+    return "\n".join(out)
+
+
+class SessionState(dict):
+    """Attribute access like st.session_state"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+class Block:
+    """A container that records elements as HTML (page, column, tab, form...)"""
+
+    def __init__(self, recorder, before="", after=""):
+        self.rec, self.before, self.after = recorder, before, after
+        self.parts = []
+
+    def __enter__(self):
+        self.rec.stack.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.rec.stack.pop()
+
+    def html(self):
+        return self.before + "".join(p if isinstance(p, str) else p.html() for p in self.parts) + self.after
+
+    def _add(self, fragment):
+        self.parts.append(fragment)
+
+    # --- Layout ---
+
+    def columns(self, spec, **kwargs):
+        widths = [1] * spec if isinstance(spec, int) else list(spec)
+        cols = [Block(self.rec, f'<div class="col" style="flex:{w}">', "</div>") for w in widths]
+        row = Block(self.rec, '<div class="row">', "</div>")
+        row.parts = cols
+        self._add(row)
+        return cols
+
+    def tabs(self, labels):
+        tabs = [Block(self.rec, f'<div class="tab"><h4 class="tab-label">{html.escape(l)}</h4>', "</div>") for l in labels]
+        self.parts.extend(tabs)
+        return tabs
+
+    def expander(self, label, expanded=False, **kwargs):
+        block = Block(self.rec, f"<details{' open' if expanded else ''}><summary>{inline_md(label)}</summary>", "</details>")
+        self._add(block)
+        return block
+
+    def form(self, key, **kwargs):
+        block = Block(self.rec, '<div class="form">', "</div>")
+        self._add(block)
+        return block
+
+    def container(self, **kwargs):
+        block = Block(self.rec)
+        self._add(block)
+        return block
+
+    def empty(self):
+        block = Placeholder(self.rec)
+        self._add(block)
+        return block
+
+    # --- Text & status ---
+
+    def markdown(self, body, unsafe_allow_html=False, **kwargs):
+        if unsafe_allow_html and str(body).lstrip().startswith("<"):
+            self._add(str(body))
+        else:
+            self._add(md_to_html(body))
+
+    def write(self, *args, **kwargs):
+        for arg in args:
+            if isinstance(arg, pd.DataFrame):
+                self.dataframe(arg)
+            else:
+                self.markdown(str(arg))
+
+    def caption(self, body, **kwargs):
+        self._add(f'<p class="caption">{inline_md(str(body))}</p>')
+
+    def code(self, body, language=None, **kwargs):
+        self._add(f'<pre class="code"><code>{html.escape(textwrap.dedent(body).strip())}</code></pre>')
+
+    def _alert(self, kind, body):
+        self._add(f'<div class="alert alert-{kind}">{md_to_html(body)}</div>')
+
+    def info(self, body, **kwargs):
+        self._alert("info", body)
+
+    def success(self, body, **kwargs):
+        self._alert("success", body)
+
+    def warning(self, body, **kwargs):
+        self._alert("warning", body)
+
+    def error(self, body, **kwargs):
+        self._alert("error", body)
+
+    def metric(self, label, value, delta=None, **kwargs):
+        self._add(f'<div class="st-metric"><div class="metric-label">{html.escape(str(label))}</div>'
+                  f'<div class="metric-value">{html.escape(str(value))}</div></div>')
+
+    def progress(self, value, text=None, **kwargs):
+        fraction = value / 100 if isinstance(value, int) else value
+        self._add(f'<progress value="{fraction:.3f}" max="1"></progress>')
+
+    # --- Media & data ---
+
+    def image(self, image, caption=None, width=None, **kwargs):
+        style = f' style="width:{width}px"' if width else ""
+        cap = f"<figcaption>{html.escape(caption)}</figcaption>" if caption else ""
+        self._add(f'<figure><img src="{html.escape(str(image))}"{style}>{cap}</figure>')
+
+    def dataframe(self, data, **kwargs):
+        self._add(pd.DataFrame(data).head(200).to_html(index=False, classes="table", border=0))
+
+    def plotly_chart(self, fig, **kwargs):
+        fig_id = self.rec.next_figure_id()
+        self.rec.figures[fig_id] = fig.to_plotly_json() if hasattr(fig, "to_plotly_json") else fig
+        self._add(f'<div class="plotly-figure" id="{fig_id}"></div>')
+
+    def graphviz_chart(self, graph, **kwargs):
+        try:
+            svg = graph.pipe(format="svg").decode("utf-8")
+            self._add('<div class="graphviz">' + svg[svg.index("<svg"):] + "</div>")
+        except graphviz.ExecutableNotFound:
+            logging.warning("Graphviz 'dot' not found; embedding the DOT source instead of SVG")
+            self._add(f'<pre class="code">{html.escape(graph.source)}</pre>')
+
+    def map(self, *args, **kwargs):
+        pass
+
+    # --- Widgets: render disabled, return their defaults ---
+
+    def button(self, label, *args, **kwargs):
+        self._add(f'<button class="static-button" disabled>{html.escape(label)}</button>')
+        return False
+
+    form_submit_button = button
+
+    def download_button(self, label, data=None, *args, **kwargs):
+        return self.button(label)
+
+    def toggle(self, label, value=False, **kwargs):
+        return value
+
+    checkbox = toggle
+
+    def slider(self, label, min_value=None, max_value=None, value=None, *args, **kwargs):
+        return min_value if value is None else value
+
+    def select_slider(self, label, options=(), value=None, **kwargs):
+        return options[0] if value is None else value
+
+    def number_input(self, label, min_value=None, max_value=None, value=0.0, *args, **kwargs):
+        return value
+
+    def text_input(self, label, value="", *args, **kwargs):
+        return value
+
+    def radio(self, label, options, index=0, *args, **kwargs):
+        return list(options)[index]
+
+    def file_uploader(self, *args, **kwargs):
+        return None
+
+
+class Placeholder(Block):
+    """st.empty(): each new element replaces the previous one"""
+
+    def _add(self, fragment):
+        self.parts = [fragment]
+
+
+class HeadlessStreamlit:
+    """Drop-in for the `st` module while a slide function runs"""
+
+    def __init__(self, slide_index):
+        self.slide_index = slide_index
+        self.session_state = SessionState()
+        self.root = Block(self)
+        self.stack = [self.root]
+        self.figures = {}
+
+    def next_figure_id(self):
+        return f"fig-{self.slide_index}-{len(self.figures)}"
+
+    def toast(self, *args, **kwargs):
+        pass
+
+    def rerun(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self.stack[-1], name)
+
+
+# ==============================================================================
+# 2. PARALLEL SLIDE RENDERING
+# ==============================================================================
+
+def load_telemetry(path):
+    name = path.lower().removesuffix(".gz")
+    if name.endswith(".parquet"):
+        # The app's Parquet export is gzipped by default; pyarrow won't unwrap that itself
+        with (gzip.open(path) if path.lower().endswith(".gz") else open(path, "rb")) as f:
+            df = pd.read_parquet(f)
+    else:
+        df = pd.read_csv(path)
+    df["time"] = pd.to_datetime(df["time"])
+    return df
+
+
+def _init_worker():
+    import streamlit.logger
+    streamlit.logger.set_log_level("error")  # Bare-mode cache warnings are expected here
+
+
+def render_slide(index, telemetry_path=None):
+    import microcasa_final as app
+
+    app.CONFIG["basemap"] = "online"  # A localhost tile server means nothing on a CDN
+    # st.fragment wrappers render nothing without a script run; call their bodies inline
+    for name, obj in list(vars(app).items()):
+        if isinstance(obj, types.FunctionType) and hasattr(obj, "__wrapped__"):
+            setattr(app, name, obj.__wrapped__)
+    rec = HeadlessStreamlit(index)
+    app.st = rec
+    app.init_session_state()
+    if telemetry_path:
+        rec.session_state.geo_data = load_telemetry(telemetry_path)
+    app.slides[index]()
+    return index, rec.root.html(), rec.figures
+
+
+def render_deck(n_slides, telemetry_path=None, workers=None):
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker) as pool:
+        results = pool.map(render_slide, range(n_slides), [telemetry_path] * n_slides)
+        return sorted(results)
+
+
+# ==============================================================================
+# 3. BUNDLE ASSEMBLY
+# ==============================================================================
+
+EXPORT_CSS = """
+body { margin: 0; background: #f4f7f6; font-family: 'Inter', sans-serif; color: #2c3e50; }
+main { max-width: 95%; margin: 0 auto; padding: 1rem 0 5rem; }
+.slide { display: none; }
+.slide.active { display: block; }
+.row { display: flex; gap: 1.5rem; align-items: flex-start; }
+.col { min-width: 0; }
+.alert { padding: 1rem 1.25rem; border-radius: 8px; margin: 0.75rem 0; }
+.alert-info { background: #e8f1fb; color: #1f4e79; }
+.alert-success { background: #e6f4ea; color: #1e5631; }
+.alert-warning { background: #fff8e1; color: #7a5b00; }
+.alert-error { background: #fdecea; color: #8a1c1c; }
+.caption { color: #7f8c8d; font-size: 0.85rem; }
+.code { background: #1e1e1e; color: #d4d4d4; padding: 1rem; border-radius: 8px; overflow-x: auto; }
+.st-metric .metric-value { font-size: 2rem; }
+.tab-label { border-bottom: 2px solid #c0392b; padding-bottom: 4px; }
+.static-button { padding: 0.5rem 1rem; border-radius: 8px; border: 1px solid #ccc; background: #fff; opacity: 0.6; }
+figure { margin: 0; } figure img { max-width: 100%; border-radius: 8px; }
+figcaption { color: #7f8c8d; font-size: 0.85rem; text-align: center; }
+progress { width: 100%; }
+.table { border-collapse: collapse; font-size: 0.85rem; } .table td, .table th { padding: 4px 8px; border-bottom: 1px solid #eee; }
+.deck-nav { position: sticky; top: 0; z-index: 10; display: flex; gap: 0.75rem; align-items: center;
+            padding: 0.6rem 2.5%; background: #2c3e50; color: white; }
+.deck-nav button, .deck-nav select { font: inherit; padding: 0.3rem 0.8rem; border-radius: 6px; border: 0; }
+.deck-nav a { color: #ecf0f1; margin-left: auto; }
+"""
+
+NAV_JS = """
+const slides = Array.from(document.querySelectorAll('.slide'));
+const picker = document.getElementById('slide-picker');
+const plotted = new Set();
+
+function show(i) {
+  i = Math.max(0, Math.min(slides.length - 1, i));
+  slides.forEach((s, k) => s.classList.toggle('active', k === i));
+  picker.value = i;
+  history.replaceState(null, '', '#slide-' + i);
+  // Figures are parsed and drawn only when their slide is first shown
+  const data = document.getElementById('figures-' + i);
+  if (data && !plotted.has(i)) {
+    plotted.add(i);
+    const figs = JSON.parse(data.textContent);
+    for (const [id, fig] of Object.entries(figs)) {
+      Plotly.newPlot(id, fig.data, fig.layout, {responsive: true});
+    }
+  }
+}
+const current = () => slides.findIndex(s => s.classList.contains('active'));
+document.getElementById('prev').onclick = () => show(current() - 1);
+document.getElementById('next').onclick = () => show(current() + 1);
+picker.onchange = () => show(+picker.value);
+document.addEventListener('keydown', e => {
+  if (e.key === 'ArrowRight' || e.key === 'PageDown') show(current() + 1);
+  if (e.key === 'ArrowLeft' || e.key === 'PageUp') show(current() - 1);
+});
+show(+(location.hash.match(/slide-(\\d+)/) || [0, 0])[1]);
+"""
+
+
+def _json_script(element_id, payload):
+    # "</" would close the <script> element early
+    text = json.dumps(payload, cls=_PlotlyEncoder).replace("</", "<\\/")
+    return f'<script type="application/json" id="{element_id}">{text}</script>'
+
+
+class _PlotlyEncoder(json.JSONEncoder):
+    def default(self, o):
+        from plotly.utils import PlotlyJSONEncoder
+        return PlotlyJSONEncoder().default(o)
+
+
+def build_bundle(out_dir, rendered, slide_names, css, plotlyjs="inline", telemetry_path=None):
+    os.makedirs(out_dir, exist_ok=True)
+    if plotlyjs == "inline":
+        from plotly.offline import get_plotlyjs
+        plotly_tag = f"<script>{get_plotlyjs()}</script>"
+    else:
+        plotly_tag = '<script src="https://cdn.plot.ly/plotly-2.35.2.min.js"></script>'
+
+    telemetry_link = ""
+    if telemetry_path:
+        snapshot = os.path.basename(telemetry_path)
+        shutil.copyfile(telemetry_path, os.path.join(out_dir, snapshot))
+        telemetry_link = f'<a href="{html.escape(snapshot)}" download>⬇️ Telemetry snapshot</a>'
+
+    options = "".join(f'<option value="{i}">{html.escape(n)}</option>' for i, n in enumerate(slide_names))
+    sections = "\n".join(
+        f'<section class="slide" id="slide-{i}">{body}</section>\n{_json_script(f"figures-{i}", figs)}'
+        for i, body, figs in rendered
+    )
+    page = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>MICROCASA 2026: Ultra Edition</title>
+<style>{css}{EXPORT_CSS}</style>
+{plotly_tag}
+</head>
+<body>
+<nav class="deck-nav">
+  <button id="prev">⬅️ PREVIOUS</button>
+  <select id="slide-picker">{options}</select>
+  <button id="next">NEXT ➡️</button>
+  {telemetry_link}
+</nav>
+<main>
+{sections}
+</main>
+<script>{NAV_JS}</script>
+</body>
+</html>
+"""
+    path = os.path.join(out_dir, "index.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(page)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default="dist", help="Output directory")
+    parser.add_argument("--telemetry", help="Telemetry snapshot (CSV or Parquet, optionally .gz) for the Looker slide")
+    parser.add_argument("--workers", type=int, default=None, help="Render processes (default: CPU count)")
+    parser.add_argument("--plotlyjs", choices=["inline", "cdn"], default="inline",
+                        help="Inline plotly.js (fully self-contained) or load it from the Plotly CDN")
+    args = parser.parse_args()
+
+    _init_worker()
+    import microcasa_final as app
+
+    start = time.perf_counter()
+    rendered = render_deck(len(app.slides), args.telemetry, args.workers)
+    path = build_bundle(args.out, rendered, app.slide_names, app.CUSTOM_CSS, args.plotlyjs, args.telemetry)
+    print(f"Exported {len(rendered)} slides to {path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
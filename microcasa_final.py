@@ -3,47 +3,90 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
+import plotly.colors
 import graphviz
+import pyarrow as pa
+import pyarrow.parquet as pq
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 import random
+import os
+import json
+import asyncio
+import logging
+import smtplib
+import threading
+import urllib.parse
+import urllib.request
+import sqlite3
+import functools
+import http.server
+import uuid
+import io
+import zlib
+import base64
+from PIL import Image
+from scipy.spatial import cKDTree
+from email.message import EmailMessage
+from collections import deque
 
 # ==============================================================================
 # 1. SYSTEM CONFIGURATION & STATE MANAGEMENT
 # ==============================================================================
 
-st.set_page_config(
-    page_title="MICROCASA 2026: Ultra Edition",
-    page_icon="📡",
-    layout="wide",
-    initial_sidebar_state="collapsed"
-)
-
-# Initialize Complex Session State
-if 'slide_index' not in st.session_state:
-    st.session_state.slide_index = 0
-if 'simulation_log' not in st.session_state:
-    st.session_state.simulation_log = []
-if 'sensor_active' not in st.session_state:
-    st.session_state.sensor_active = False
-if 'geo_data' not in st.session_state:
-    # Pre-seed with some data around USM Penang for the Heatmap to look good immediately
-    # Base coords: 5.356, 100.30 (USM)
-    st.session_state.geo_data = pd.DataFrame({
-        "lat": np.random.uniform(5.350, 5.360, 50),
-        "lon": np.random.uniform(100.29, 100.31, 50),
-        "temp": np.random.normal(28, 4, 50),
-        "humidity": np.random.normal(60, 10, 50),
-        "time": [datetime.now()] * 50
-    })
+# Deployment Settings (override via environment variables)
+CONFIG = {
+    "alert_sink": os.environ.get("MICROCASA_ALERT_SINK", "log"),  # log | smtp | webhook
+    "smtp_host": os.environ.get("MICROCASA_SMTP_HOST", "localhost"),
+    "smtp_port": int(os.environ.get("MICROCASA_SMTP_PORT", "1025")),
+    "alert_from": os.environ.get("MICROCASA_ALERT_FROM", "microcasa@usm.my"),
+    "alert_to": os.environ.get("MICROCASA_ALERT_TO", "manager@usm.my"),
+    "webhook_url": os.environ.get("MICROCASA_WEBHOOK_URL", ""),
+    "basemap": os.environ.get("MICROCASA_BASEMAP", "online"),  # online | offline
+    "mbtiles_path": os.environ.get("MICROCASA_MBTILES", "tiles/usm_penang.mbtiles"),
+    "tile_port": int(os.environ.get("MICROCASA_TILE_PORT", "8765")),
+    "tile_cache_size": int(os.environ.get("MICROCASA_TILE_CACHE", "4096")),
+    "presenter_key": os.environ.get("MICROCASA_PRESENTER_KEY", ""),
+    "log_level": os.environ.get("MICROCASA_LOG_LEVEL", "WARNING").upper(),
+}
+# URL the browser fetches tiles from (override when serving to other devices)
+CONFIG["tile_url"] = os.environ.get("MICROCASA_TILE_URL", f"http://localhost:{CONFIG['tile_port']}/{{z}}/{{x}}/{{y}}")
+
+# App logger (Streamlit's --logger.level only configures Streamlit's own loggers)
+logger = logging.getLogger("microcasa")
+logger.setLevel(CONFIG["log_level"])
+if not logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(_log_handler)
+    logger.propagate = False
+
+def init_session_state():
+    # Initialize Complex Session State
+    if 'slide_index' not in st.session_state:
+        st.session_state.slide_index = 0
+    if 'simulation_log' not in st.session_state:
+        st.session_state.simulation_log = []
+    if 'sensor_active' not in st.session_state:
+        st.session_state.sensor_active = False
+    if 'session_uid' not in st.session_state:
+        st.session_state.session_uid = uuid.uuid4().hex
+    if 'geo_data' not in st.session_state:
+        # Pre-seed with some data around USM Penang for the Heatmap to look good immediately
+        # Base coords: 5.356, 100.30 (USM)
+        st.session_state.geo_data = pd.DataFrame({
+            "lat": np.random.uniform(5.350, 5.360, 50),
+            "lon": np.random.uniform(100.29, 100.31, 50),
+            "temp": np.random.normal(28, 4, 50),
+            "humidity": np.random.normal(60, 10, 50),
+            "time": [datetime.now()] * 50
+        })
 
 # ==============================================================================
 # 2. ADVANCED CSS ARCHITECTURE (ANIMATIONS & LAYOUTS)
 # ==============================================================================
 
-def inject_custom_css():
-    st.markdown("""
-    <style>
+CUSTOM_CSS = """
         /* --- 1. CORE RESET & FONTS --- */
         @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600;800&family=JetBrains+Mono:wght@400;700&display=swap');
         
@@ -215,10 +258,10 @@ def inject_custom_css():
             margin: 20px 0;
             border-radius: 0 15px 15px 0;
         }
-    </style>
-    """, unsafe_allow_html=True)
+"""
 
-inject_custom_css()
+def inject_custom_css():
+    st.markdown(f"<style>{CUSTOM_CSS}</style>", unsafe_allow_html=True)
 
 # ==============================================================================
 # 3. RESEARCH DATA KERNEL (THE TRUTH SOURCE)
@@ -271,6 +314,1084 @@ class ResearchData:
             {"text": "The coding (Apps Script) was hard to follow at first... but I see how it ensures continuous data flow.", "theme": "Productive Friction"}
         ]
 
+# ==============================================================================
+# 3.1 TELEMETRY STREAM ENGINE (HIGH-RATE INGEST, FIXED-FRAME RENDER)
+# ==============================================================================
+
+# Readings from one stream run that reach geo_data (the maps don't need all 150k)
+STREAM_GEO_MAX_ROWS = 2000
+
+
+class TelemetryStream:
+    """Bounded scrollback buffer that decouples sensor ingest from UI redraws"""
+
+    def __init__(self, scrollback=2000, max_batch=2000, detector=None):
+        self.buffer = deque(maxlen=scrollback)
+        self.max_batch = max_batch
+        self.detector = detector
+        self.pending_geo = []
+        self.ingested = 0
+        self.dropped = 0
+        self.anomalies = 0
+        self.frames = 0
+        self.rate_hz = 0.0
+        self.latest = None
+        self.finished = False
+        self._tick_time = time.perf_counter()
+        self._tick_count = 0
+
+    def log(self, line):
+        self.buffer.append(line)
+
+    def ingest_batch(self, temps, humids, lats, lons, devices):
+        # Backpressure: if the UI stalled, keep only the newest readings
+        overflow = len(temps) - self.max_batch
+        if overflow > 0:
+            self.dropped += overflow
+            temps, humids, lats, lons, devices = (a[overflow:] for a in (temps, humids, lats, lons, devices))
+        if len(temps) == 0:
+            return
+
+        now = datetime.now()
+        stamp = now.strftime("%H:%M:%S.%f")[:-3]
+        if self.detector is not None:
+            zscores = self.detector.observe(temps, lats, lons, devices, now)
+            self.anomalies += int(self.detector.is_anomaly(zscores).sum())
+        else:
+            zscores = np.full(len(temps), np.nan)
+        self.buffer.extend(zip([stamp] * len(temps), temps, humids, lats, lons, devices, zscores))
+        self.pending_geo.append({"lat": lats, "lon": lons, "temp": temps, "humidity": humids, "time": [now] * len(temps)})
+        self.ingested += len(temps)
+        self._tick_count += len(temps)
+        self.latest = (temps[-1], humids[-1], lats[-1], lons[-1])
+
+    def tick(self):
+        # Coalesce the ingest rate once per frame (EWMA smooths bursty batches)
+        now = time.perf_counter()
+        dt = now - self._tick_time
+        if dt > 0:
+            self.rate_hz = 0.3 * (self._tick_count / dt) + 0.7 * self.rate_hz
+        self._tick_time = now
+        self._tick_count = 0
+        self.frames += 1
+
+    def tail(self, n):
+        start = max(len(self.buffer) - n, 0)
+        return [self.buffer[i] for i in range(start, len(self.buffer))]
+
+    def flush_geo(self, geo_data, max_rows=STREAM_GEO_MAX_ROWS):
+        # One concat per run instead of one per reading, evenly downsampled to max_rows
+        if not self.pending_geo:
+            return geo_data
+        batch = pd.concat([pd.DataFrame(p) for p in self.pending_geo], ignore_index=True)
+        self.pending_geo = []
+        if len(batch) > max_rows:
+            batch = batch.iloc[np.linspace(0, len(batch) - 1, max_rows).astype(int)].reset_index(drop=True)
+        return pd.concat([geo_data, batch], ignore_index=True)
+
+
+def simulate_readings(n, n_devices=1, spike_rate=0.0):
+    """Vectorised DHT22 + GPS readings around the USM Penang campus"""
+    temps = np.round(np.random.uniform(25.0, 34.0, n), 1)
+    humids = np.round(np.random.uniform(50, 80, n), 1)
+    lats = np.round(5.35 + np.random.uniform(-0.01, 0.01, n), 4)
+    lons = np.round(100.30 + np.random.uniform(-0.01, 0.01, n), 4)
+    devices = np.random.randint(1, n_devices + 1, n)
+    # Occasional hot spots (e.g. a generator exhaust) for the anomaly detector to catch
+    spikes = np.random.random(n) < spike_rate
+    temps[spikes] = np.round(temps[spikes] + np.random.uniform(8, 14, spikes.sum()), 1)
+    return temps, humids, lats, lons, devices
+
+
+def format_serial_line(entry):
+    if isinstance(entry, str):
+        return entry
+    stamp, temp, humid, _, _, device, z = entry
+    if abs(z) > ANOMALY_Z_THRESHOLD:
+        return f'<span style="color:#ff5555">[{stamp}] ESP32-{device:02d} T:{temp}C H:{humid}% -> ANOMALY z={z:+.1f}</span>'
+    status = "NORMAL" if temp < 30 else "ALERT!!"
+    return f"[{stamp}] ESP32-{device:02d} T:{temp}C H:{humid}% -> {status}"
+
+
+def render_serial_monitor(stream, lines=12):
+    log_html = "".join(f'<div class="terminal-line">{format_serial_line(e)}</div>' for e in stream.tail(lines))
+    return f'<div class="terminal-window">{log_html}<div class="terminal-line" style="animation: blink 1s infinite;">_</div></div>'
+
+
+def render_register_view(stream):
+    temp, humid, lat, lon = stream.latest
+    return f"""
+    <div class="telemetry-panel">
+    <strong>REGISTER MAP:</strong><br>
+    Address: 0x3F<br>
+    Payload: JSON<br>
+    ----------------<br>
+    Temp: <span style="color:#e74c3c">{temp}</span><br>
+    Humid: <span style="color:#3498db">{humid}</span><br>
+    Geo: {lat}, {lon}<br>
+    ----------------<br>
+    Rate: {stream.rate_hz:,.0f} Hz<br>
+    Ingested: {stream.ingested:,}<br>
+    Dropped: {stream.dropped:,}<br>
+    Anomalies: <span style="color:#ff5555">{stream.anomalies:,}</span><br>
+    Scrollback: {len(stream.buffer):,}/{stream.buffer.maxlen:,}
+    </div>
+    """
+
+
+def draw_stream_frame(stream, log_container, data_table):
+    log_container.markdown(render_serial_monitor(stream), unsafe_allow_html=True)
+    if stream.latest is not None:
+        data_table.markdown(render_register_view(stream), unsafe_allow_html=True)
+
+
+@st.fragment(run_every=0.5)
+def watch_live_stream(stream, log_container, data_table):
+    # Followers redraw the presenter's stream from its buffer; the presenter's thread does the ingest
+    draw_stream_frame(stream, log_container, data_table)
+
+
+def run_telemetry_stream(stream, log_container, data_table, ingest_hz, frame_hz, n_readings, n_devices=1, spike_rate=0.0):
+    """Ingest readings on a wall-clock schedule, redraw only once per frame"""
+    frame_dt = 1.0 / frame_hz
+    # Backpressure budget of two frames' worth of readings: only an overdue frame drops data
+    stream.max_batch = max(2 * int(np.ceil(ingest_hz * frame_dt)), 1)
+    start = time.perf_counter()
+    produced = 0
+    drawn = None
+    # Published up front so followers can watch the run while it is still streaming
+    st.session_state.last_stream = stream
+    if st.session_state.get('role') == "Presenter":
+        publish_presenter_state()
+    try:
+        while produced < n_readings:
+            frame_deadline = time.perf_counter() + frame_dt
+
+            # 1. Ingest every reading that became due since the last frame
+            due = min(int((time.perf_counter() - start) * ingest_hz) + 1, n_readings) - produced
+            if due > 0:
+                stream.ingest_batch(*simulate_readings(due, n_devices, spike_rate))
+                produced += due
+            stream.tick()
+
+            # 2. Redraw the latest lines only, and only when something new arrived
+            if stream.latest is not None and stream.ingested != drawn:
+                log_container.markdown(render_serial_monitor(stream), unsafe_allow_html=True)
+                data_table.markdown(render_register_view(stream), unsafe_allow_html=True)
+                drawn = stream.ingested
+
+            time.sleep(max(0.0, frame_deadline - time.perf_counter()))
+    finally:
+        # Add to Global Geo State for Heatmap later; one upload = one run, not one per rerun
+        st.session_state.geo_data = stream.flush_geo(st.session_state.geo_data)
+        st.session_state.sensor_active = False
+        stream.log("[DONE] Stream finished. Upload again to restart.")
+        stream.finished = True
+
+# ==============================================================================
+# 3.2 APPSHEET CONSTRAINT RULES (VECTORISED BULK VALIDATION)
+# ==============================================================================
+
+# Field spreadsheets arrive with all sorts of headers; map them onto geo_data columns
+FIELD_COLUMN_ALIASES = {
+    "latitude": "lat", "lng": "lon", "long": "lon", "longitude": "lon",
+    "temperature": "temp", "temp_c": "temp", "temperature_c": "temp",
+    "humid": "humidity", "rh": "humidity",
+    "timestamp": "time", "datetime": "time", "date": "time",
+    "location_id": "location",
+}
+
+# Penang study area (lat_min, lat_max, lon_min, lon_max)
+STUDY_AREA_BOUNDS = (5.10, 5.60, 100.10, 100.60)
+
+
+def normalise_field_columns(df):
+    cols = [str(c).strip().lower().replace(" ", "_") for c in df.columns]
+    clashes = sorted({c for c in cols if cols.count(c) > 1})
+    if clashes:
+        raise ValueError(f"duplicate columns: {', '.join(clashes)}")
+    # An alias never replaces a column that already has the canonical name (Date + Time, lon + lng)
+    renames = {}
+    for c in cols:
+        target = FIELD_COLUMN_ALIASES.get(c)
+        if target and target not in cols and target not in renames.values():
+            renames[c] = target
+    return df.set_axis(cols, axis=1).rename(columns=renames)
+
+
+def parse_field_times(values):
+    """Timestamps as naive local time, like the datetime.now() stamps already in geo_data"""
+    try:
+        stamp = pd.to_datetime(values, errors="coerce")
+    except ValueError:  # Mixed UTC offsets (e.g. "Z" next to "+08:00")
+        stamp = pd.to_datetime(values, errors="coerce", utc=True)
+    if stamp.dt.tz is not None:
+        stamp = stamp.dt.tz_convert(datetime.now().astimezone().tzinfo).dt.tz_localize(None)
+    return stamp
+
+
+def validate_field_readings(raw):
+    """Apply the AppSheet constraint rules as column checks.
+
+    Returns (accepted, rejected, summary) where ``rejected`` carries a
+    ``rejected_rules`` column and ``summary`` counts failures per rule.
+    """
+    df = normalise_field_columns(raw)
+    n = len(df)
+
+    def numeric(col):
+        if col not in df:
+            return pd.Series(np.nan, index=df.index)
+        return pd.to_numeric(df[col], errors="coerce")
+
+    lat, lon, temp = numeric("lat"), numeric("lon"), numeric("temp")
+    humidity = numeric("humidity") if "humidity" in df else pd.Series(60.0, index=df.index)
+    if "time" in df:
+        stamp = parse_field_times(df["time"])
+    else:
+        stamp = pd.Series(pd.Timestamp(datetime.now()), index=df.index)
+
+    lat_min, lat_max, lon_min, lon_max = STUDY_AREA_BOUNDS
+    rules = {
+        "Type: GPS/Decimal/DateTime": lat.isna() | lon.isna() | temp.isna() | humidity.isna() | stamp.isna(),
+        "GPS outside study area": ~(lat.between(lat_min, lat_max) & lon.between(lon_min, lon_max)),
+        "Temperature cannot be negative": temp < 0,
+        "Value exceeds realistic sensor range": (temp > 50) | ~humidity.between(0, 100),
+    }
+    # A type failure makes the other checks meaningless for that row
+    typed = ~rules["Type: GPS/Decimal/DateTime"]
+    for name in list(rules)[1:]:
+        rules[name] = rules[name] & typed
+
+    failed = pd.Series(False, index=df.index)
+    reasons = pd.Series("", index=df.index)
+    for name, mask in rules.items():
+        failed |= mask
+        reasons = reasons + np.where(mask, name + "; ", "")
+
+    accepted = pd.DataFrame({
+        "lat": lat[~failed], "lon": lon[~failed], "temp": temp[~failed],
+        "humidity": humidity[~failed], "time": stamp[~failed],
+    }).reset_index(drop=True)
+
+    rejected = raw.loc[failed.to_numpy()].copy()
+    rejected["rejected_rules"] = reasons[failed].str.rstrip("; ").to_numpy()
+
+    summary = pd.DataFrame({
+        "Rule": list(rules),
+        "Rejected Rows": [int(m.sum()) for m in rules.values()],
+    })
+    summary.attrs["total"] = n
+    return accepted, rejected, summary
+
+
+def read_field_upload(uploaded):
+    name = uploaded.name.lower()
+    if name.endswith(".csv"):
+        return pd.read_csv(uploaded)
+    return pd.read_json(uploaded, lines=name.endswith(".jsonl"))
+
+# ==============================================================================
+# 3.3 ALERT DISPATCHER (ASYNC QUEUE, DEDUP, RATE LIMITS, DIGESTS)
+# ==============================================================================
+
+ALERT_THRESHOLD_C = 35.0
+
+
+class LogSink:
+    name = "Log"
+
+    def send(self, subject, body):
+        logger.warning("%s | %s", subject, body)
+
+
+class SmtpSink:
+    name = "SMTP"
+
+    def __init__(self, host, port, sender, recipient):
+        self.host, self.port = host, port
+        self.sender, self.recipient = sender, recipient
+
+    def send(self, subject, body):
+        msg = EmailMessage()
+        msg["From"], msg["To"], msg["Subject"] = self.sender, self.recipient, subject
+        msg.set_content(body)
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            smtp.send_message(msg)
+
+
+class WebhookSink:
+    name = "Webhook"
+
+    def __init__(self, url):
+        self.url = url
+
+    def send(self, subject, body):
+        payload = json.dumps({"subject": subject, "body": body}).encode("utf-8")
+        req = urllib.request.Request(self.url, data=payload, headers={"Content-Type": "application/json"})
+        urllib.request.urlopen(req, timeout=10).close()
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate, self.capacity = rate, capacity
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class AlertDispatcher:
+    """Replaces one-email-per-reading with a queue on its own event loop.
+
+    The first alert for a location is delivered immediately (if the token
+    bucket allows); repeats inside ``dedup_window`` and rate-limited alerts
+    are folded into a per-location digest sent every ``digest_interval``.
+    """
+
+    def __init__(self, sink, rate=0.2, burst=5, dedup_window=300, digest_interval=60, max_queue=10000):
+        self.sink = sink
+        self.bucket = TokenBucket(rate, burst)
+        self.dedup_window = dedup_window
+        self.digest_interval = digest_interval
+        self.last_sent = {}
+        self.pending = {}
+        self.outbox = deque(maxlen=20)
+        self.latencies = deque(maxlen=1000)
+        self.metrics = {"received": 0, "delivered": 0, "deduplicated": 0, "rate_limited": 0,
+                        "digests": 0, "dropped": 0, "failed": 0}
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self._run, name="alert-dispatcher", daemon=True).start()
+
+    # --- Producer side (any thread) ---
+
+    def submit(self, key, temp):
+        self.loop.call_soon_threadsafe(self._enqueue, (key, float(temp), time.monotonic()))
+
+    def flush_digest(self):
+        asyncio.run_coroutine_threadsafe(self._send_digest(), self.loop)
+
+    def stats(self):
+        lat = np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            **self.metrics,
+            "queue_depth": self.queue.qsize(),
+            "pending_digest": sum(e["count"] for e in list(self.pending.values())),
+            "latency_p50_ms": float(np.percentile(lat, 50) * 1000),
+            "latency_p95_ms": float(np.percentile(lat, 95) * 1000),
+        }
+
+    # --- Event loop side ---
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.create_task(self._digest_loop())
+        self.loop.run_until_complete(self._consume())
+
+    def _enqueue(self, alert):
+        try:
+            self.queue.put_nowait(alert)
+        except asyncio.QueueFull:
+            self.metrics["dropped"] += 1
+
+    async def _consume(self):
+        while True:
+            key, temp, enqueued = await self.queue.get()
+            self.metrics["received"] += 1
+            now = time.monotonic()
+            if now - self.last_sent.get(key, -np.inf) < self.dedup_window:
+                self.metrics["deduplicated"] += 1
+                self._fold(key, temp, enqueued)
+            elif not self.bucket.take():
+                self.metrics["rate_limited"] += 1
+                self._fold(key, temp, enqueued)
+            else:
+                if await self._deliver(f"CRITICAL ALERT: {key}", f"Action required. Sensor reading: {temp:.1f} °C", [enqueued]):
+                    self.last_sent[key] = now  # Only a delivered alert opens a dedup window
+                else:
+                    self._fold(key, temp, enqueued)  # Retried with the next digest
+
+    def _fold(self, key, temp, enqueued):
+        entry = self.pending.setdefault(key, {"count": 0, "peak": temp, "first": enqueued})
+        entry["count"] += 1
+        entry["peak"] = max(entry["peak"], temp)
+
+    async def _digest_loop(self):
+        while True:
+            await asyncio.sleep(self.digest_interval)
+            await self._send_digest()
+
+    async def _send_digest(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+        total = sum(e["count"] for e in batch.values())
+        body = "\n".join(f"{k}: {e['count']} readings, peak {e['peak']:.1f} °C"
+                         for k, e in sorted(batch.items(), key=lambda kv: -kv[1]["peak"]))
+        if await self._deliver(f"ALERT DIGEST: {total} readings across {len(batch)} locations", body,
+                               [e["first"] for e in batch.values()]):
+            self.metrics["digests"] += 1
+            return
+        # Put the batch back (merged with anything folded meanwhile) for the next digest
+        for key, entry in batch.items():
+            merged = self.pending.setdefault(key, {"count": 0, "peak": entry["peak"], "first": entry["first"]})
+            merged["count"] += entry["count"]
+            merged["peak"] = max(merged["peak"], entry["peak"])
+            merged["first"] = min(merged["first"], entry["first"])
+
+    async def _deliver(self, subject, body, enqueued_times):
+        try:
+            await asyncio.to_thread(self.sink.send, subject, body)
+        except Exception as e:  # A sink error must never kill the dispatcher thread
+            self.metrics["failed"] += 1
+            logger.error("Alert delivery via %s failed: %s", self.sink.name, e)
+            return False
+        now = time.monotonic()
+        self.latencies.extend(now - t for t in enqueued_times)
+        self.metrics["delivered"] += 1
+        self.outbox.appendleft((datetime.now().strftime("%H:%M:%S"), subject))
+        return True
+
+
+def make_alert_sink():
+    if CONFIG["alert_sink"] == "smtp":
+        return SmtpSink(CONFIG["smtp_host"], CONFIG["smtp_port"], CONFIG["alert_from"], CONFIG["alert_to"])
+    if CONFIG["alert_sink"] == "webhook" and CONFIG["webhook_url"]:
+        url = urllib.parse.urlsplit(CONFIG["webhook_url"])
+        if url.scheme in ("http", "https") and url.netloc:
+            return WebhookSink(CONFIG["webhook_url"])
+        logger.error("MICROCASA_WEBHOOK_URL must be an http(s) URL; falling back to the log sink")
+    return LogSink()
+
+
+@st.cache_resource
+def get_alert_dispatcher():
+    # One dispatcher per server process, shared by every session
+    return AlertDispatcher(make_alert_sink())
+
+
+def dispatch_heat_alerts(df, location=None):
+    """Queue an alert for every reading above the Apps Script threshold"""
+    hot = df[df["temp"] > ALERT_THRESHOLD_C]
+    if hot.empty:
+        return 0
+    dispatcher = get_alert_dispatcher()
+    if location is not None:
+        keys = [location] * len(hot)
+    else:
+        keys = [f"Cell {lat:.3f}, {lon:.3f}" for lat, lon in zip(hot["lat"], hot["lon"])]
+    for key, temp in zip(keys, hot["temp"].tolist()):
+        dispatcher.submit(key, temp)
+    return len(hot)
+
+# ==============================================================================
+# 3.4 TELEMETRY EXPORT (CHUNKED, LAZY, OPTIONAL GZIP)
+# ==============================================================================
+
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_FORMATS = {"CSV": ("csv", "text/csv"), "Parquet": ("parquet", "application/octet-stream"),
+                  "GeoJSON": ("geojson", "application/geo+json")}
+
+
+def telemetry_filter_mask(df, time_range=None, bbox=None):
+    mask = np.ones(len(df), dtype=bool)
+    if time_range is not None:
+        t = pd.to_datetime(df["time"])
+        mask &= ((t >= time_range[0]) & (t <= time_range[1])).to_numpy()
+    if bbox is not None:
+        lat_min, lat_max, lon_min, lon_max = bbox
+        mask &= (df["lat"].between(lat_min, lat_max) & df["lon"].between(lon_min, lon_max)).to_numpy()
+    return mask
+
+
+def iter_telemetry_chunks(df, time_range=None, bbox=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    # Filter chunk by chunk so the full filtered frame never exists at once
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        chunk = chunk[telemetry_filter_mask(chunk, time_range, bbox)]
+        if not chunk.empty:
+            yield chunk[["time", "lat", "lon", "temp", "humidity"]]
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only sink the Parquet writer can append to while we drain it"""
+
+    def __init__(self):
+        self.parts, self.pos = [], 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.parts.append(bytes(b))
+        self.pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self.pos
+
+    def drain(self):
+        out, self.parts = b"".join(self.parts), []
+        return out
+
+
+def _csv_bytes(chunks):
+    header = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+def _parquet_bytes(chunks):
+    sink, writer = _DrainableSink(), None
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def _geojson_bytes(chunks):
+    yield b'{"type": "FeatureCollection", "features": ['
+    first = True
+    for chunk in chunks:
+        features = [
+            json.dumps({"type": "Feature", "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                        "properties": {"time": pd.Timestamp(t).isoformat(), "temp": temp, "humidity": humid}})
+            for t, lat, lon, temp, humid in zip(chunk["time"], chunk["lat"], chunk["lon"],
+                                                chunk["temp"].astype(float), chunk["humidity"].astype(float))
+        ]
+        yield (("" if first else ",") + ",".join(features)).encode("utf-8")
+        first = False
+    yield b"]}"
+
+
+def iter_telemetry_export(df, fmt, time_range=None, bbox=None, compress=False, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Lazily yield the export as bounded-size byte chunks"""
+    encoder = {"CSV": _csv_bytes, "Parquet": _parquet_bytes, "GeoJSON": _geojson_bytes}[fmt]
+    stream = encoder(iter_telemetry_chunks(df, time_range, bbox, chunk_rows))
+    if not compress:
+        yield from stream
+        return
+    gz = zlib.compressobj(wbits=31)  # gzip container
+    for block in stream:
+        yield gz.compress(block)
+    yield gz.flush()
+
+
+def build_telemetry_export(*args, **kwargs):
+    # Streamlit's media store keeps the finished download in memory, so the whole
+    # (compressed) file is held once; chunking only avoids extra full-size copies
+    return b"".join(iter_telemetry_export(*args, **kwargs))
+
+# ==============================================================================
+# 3.5 ONLINE ANOMALY DETECTION (EWMA Z-SCORES PER CELL & DEVICE)
+# ==============================================================================
+
+ANOMALY_Z_THRESHOLD = 3.0
+
+
+class _EwmaState:
+    """Dense EWMA mean/variance arrays indexed by integer slot"""
+
+    def __init__(self, size, alpha, warmup):
+        self.alpha, self.warmup = alpha, warmup
+        self.mean = np.zeros(size, dtype=np.float32)
+        self.var = np.zeros(size, dtype=np.float32)
+        self.count = np.zeros(size, dtype=np.uint16)
+
+    def grow(self, size):
+        if size <= len(self.mean):
+            return
+        pad = size - len(self.mean)
+        self.mean = np.concatenate([self.mean, np.zeros(pad, np.float32)])
+        self.var = np.concatenate([self.var, np.zeros(pad, np.float32)])
+        self.count = np.concatenate([self.count, np.zeros(pad, np.uint16)])
+
+    def update(self, slots, x):
+        """Score each reading against its slot, then fold it in (O(1) each).
+
+        Repeated slots in one batch are applied in rounds (k-th reading of
+        every slot in round k) so the result matches one-at-a-time updates.
+        """
+        slots = np.asarray(slots)
+        n = len(slots)
+        z = np.full(n, np.nan)
+        if n == 0:
+            return z
+
+        # Rank of each reading among earlier readings of the same slot
+        order = np.argsort(slots, kind="stable")
+        sorted_slots = slots[order]
+        run_start = np.r_[True, sorted_slots[1:] != sorted_slots[:-1]]
+        first_of_run = np.maximum.accumulate(np.where(run_start, np.arange(n), 0))
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n) - first_of_run
+        by_round = np.argsort(rank, kind="stable")
+        bounds = np.r_[0, np.cumsum(np.bincount(rank))]
+
+        for r in range(len(bounds) - 1):
+            idx = by_round[bounds[r]:bounds[r + 1]]
+            s, xs = slots[idx], x[idx]
+            m, v, c = self.mean[s], self.var[s], self.count[s]
+
+            std = np.sqrt(v)
+            ready = (c >= self.warmup) & (std > 0)
+            z[idx] = np.where(ready, (xs - m) / np.where(std > 0, std, 1), np.nan)
+
+            # Start as a running mean, settle to the configured alpha
+            a = np.maximum(self.alpha, 1.0 / (c.astype(np.float32) + 1))
+            diff = xs - m
+            self.mean[s] = m + a * diff
+            self.var[s] = (1 - a) * (v + a * diff * diff)
+            self.count[s] = np.minimum(c.astype(np.uint32) + 1, np.iinfo(np.uint16).max)
+        return z
+
+
+class EwmaAnomalyDetector:
+    """Streaming hazard detector: EWMA z-scores per spatial cell and per device.
+
+    Cells are a fixed ~165 m grid over STUDY_AREA_BOUNDS, so state is
+    10 bytes per cell (~1.1 MB for ~110k cells) and never revisits history.
+    """
+
+    def __init__(self, cell_deg=0.0015, alpha=0.05, warmup=10, max_recent=500):
+        lat_min, lat_max, lon_min, lon_max = STUDY_AREA_BOUNDS
+        self.cell_deg = cell_deg
+        self.n_rows = int(np.ceil((lat_max - lat_min) / cell_deg))
+        self.n_cols = int(np.ceil((lon_max - lon_min) / cell_deg))
+        self.cells = _EwmaState(self.n_rows * self.n_cols, alpha, warmup)
+        self.devices = _EwmaState(16, alpha, warmup)
+        self.device_slots = {}
+        self.recent = deque(maxlen=max_recent)
+
+    def cell_index(self, lats, lons):
+        lat_min, _, lon_min, _ = STUDY_AREA_BOUNDS
+        rows = np.clip(((np.asarray(lats) - lat_min) / self.cell_deg).astype(np.int64), 0, self.n_rows - 1)
+        cols = np.clip(((np.asarray(lons) - lon_min) / self.cell_deg).astype(np.int64), 0, self.n_cols - 1)
+        return rows * self.n_cols + cols
+
+    def _device_index(self, devices):
+        keys, inverse = np.unique(np.asarray(devices), return_inverse=True)
+        slots = np.array([self.device_slots.setdefault(k, len(self.device_slots)) for k in keys.tolist()], dtype=np.int64)
+        self.devices.grow(max(16, 2 * len(self.device_slots)))
+        return slots[inverse]
+
+    @staticmethod
+    def is_anomaly(z):
+        return np.abs(np.nan_to_num(z)) > ANOMALY_Z_THRESHOLD
+
+    def observe(self, temps, lats, lons, devices=None, when=None):
+        """Returns the stronger of the cell and device z-score per reading"""
+        x = np.asarray(temps, dtype=np.float32)
+        z = self.cells.update(self.cell_index(lats, lons), x)
+        if devices is not None:
+            z_dev = self.devices.update(self._device_index(devices), x)
+            z = np.where(np.abs(np.nan_to_num(z_dev)) > np.abs(np.nan_to_num(z)), z_dev, z)
+
+        flagged = np.flatnonzero(self.is_anomaly(z))
+        when = when or datetime.now()
+        for i in flagged[-self.recent.maxlen:]:
+            self.recent.append({"lat": float(lats[i]), "lon": float(lons[i]), "temp": float(x[i]), "z": float(z[i]), "time": when})
+        return z
+
+
+def get_anomaly_detector():
+    # Per-session detector, seeded once from the readings already on the map
+    if 'anomaly_detector' not in st.session_state:
+        detector = EwmaAnomalyDetector()
+        geo = st.session_state.geo_data
+        detector.observe(geo["temp"].to_numpy(), geo["lat"].to_numpy(), geo["lon"].to_numpy())
+        st.session_state.anomaly_detector = detector
+    return st.session_state.anomaly_detector
+
+# ==============================================================================
+# 3.6 INTERPOLATED RISK SURFACE (TILED IDW / SIMPLE KRIGING)
+# ==============================================================================
+
+# USM campus grid (lat_min, lat_max, lon_min, lon_max)
+CAMPUS_GRID_BOUNDS = (5.338, 5.366, 100.284, 100.316)
+
+
+class RiskSurface:
+    """Temperature estimate between sensors on a cached campus grid.
+
+    Each grid point uses at most ``k`` readings within ``radius_m``, so a
+    new reading can only change the tiles its radius touches; only those
+    tiles are recomputed when new rows show up in geo_data.
+    """
+
+    def __init__(self, method="IDW", shape=(160, 160), tile=20, k=8, radius_m=400.0, power=2.0):
+        lat_min, lat_max, lon_min, lon_max = CAMPUS_GRID_BOUNDS
+        self.method, self.tile, self.k = method, tile, k
+        self.radius_m, self.power = radius_m, power
+        self.lat0, self.lon0 = (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+        lat_grid, lon_grid = np.meshgrid(np.linspace(lat_min, lat_max, shape[0]),
+                                         np.linspace(lon_min, lon_max, shape[1]), indexing="ij")
+        self.gx, self.gy = self._to_xy(lat_grid, lon_grid)
+        self.dx = self.gx[0, 1] - self.gx[0, 0]
+        self.dy = self.gy[1, 0] - self.gy[0, 0]
+        self.n_tiles = (int(np.ceil(shape[0] / tile)), int(np.ceil(shape[1] / tile)))
+        self.lock = threading.Lock()  # Audience sessions share the presenter's surfaces
+        self._reset()
+
+    def _reset(self):
+        self.values = np.full(self.gx.shape, np.nan)
+        self.xy = np.empty((0, 2))
+        self.z = np.empty(0)
+        self.tree = None
+        self.krige_params = None
+        self.n_seen = 0
+        self.version = 0
+        self.tiles_recomputed = 0
+        self._image = (None, None)
+
+    def _to_xy(self, lat, lon):
+        # Local equirectangular metres; plenty accurate across one campus
+        return (lon - self.lon0) * 111320 * np.cos(np.radians(self.lat0)), (lat - self.lat0) * 110540
+
+    def update(self, df):
+        """Fold in rows appended since the last call; returns tiles recomputed"""
+        with self.lock:
+            return self._update(df)
+
+    def _update(self, df):
+        if len(df) < self.n_seen:
+            self._reset()
+        new = df.iloc[self.n_seen:]
+        self.tiles_recomputed = 0
+        if new.empty:
+            return 0
+
+        x, y = self._to_xy(new["lat"].to_numpy(float), new["lon"].to_numpy(float))
+        z = new["temp"].to_numpy(float)
+        ok = np.isfinite(x) & np.isfinite(y) & np.isfinite(z)
+        x, y, z = x[ok], y[ok], z[ok]
+        first_build = self.n_seen == 0
+        self.xy = np.vstack([self.xy, np.column_stack([x, y])])
+        self.z = np.concatenate([self.z, z])
+        self.n_seen = len(df)
+        if len(self.z) == 0:
+            return 0
+        self.tree = cKDTree(self.xy)
+
+        if self.method == "Simple Kriging" and self._kriging_drifted():
+            first_build = True
+        if first_build:
+            dirty = [(ti, tj) for ti in range(self.n_tiles[0]) for tj in range(self.n_tiles[1])]
+        else:
+            dirty = self._dirty_tiles(x, y)
+        for ti, tj in dirty:
+            self._compute_tile(ti, tj)
+        self.tiles_recomputed = len(dirty)
+        if dirty:
+            self.version += 1
+        return len(dirty)
+
+    def _kriging_drifted(self, tolerance=0.05):
+        # Mean and sill are frozen between rebuilds so untouched tiles stay consistent
+        mean, sill = self.z.mean(), max(self.z.var(), 1e-6)
+        if self.krige_params is not None:
+            old_mean, old_sill = self.krige_params
+            if abs(mean - old_mean) <= tolerance * abs(old_mean) and abs(sill - old_sill) <= tolerance * old_sill:
+                return False
+        self.krige_params = (mean, sill)
+        return True
+
+    def _dirty_tiles(self, x, y):
+        # Grid rows/cols inside each reading's radius, mapped to (exclusive) tile ranges
+        x0, y0 = self.gx[0, 0], self.gy[0, 0]
+        ti_lo = np.floor((y - self.radius_m - y0) / self.dy).astype(int) // self.tile
+        ti_hi = np.ceil((y + self.radius_m - y0) / self.dy).astype(int) // self.tile + 1
+        tj_lo = np.floor((x - self.radius_m - x0) / self.dx).astype(int) // self.tile
+        tj_hi = np.ceil((x + self.radius_m - x0) / self.dx).astype(int) // self.tile + 1
+        mask = np.zeros(self.n_tiles, dtype=bool)
+        for a, b, c, d in np.unique(np.column_stack([ti_lo, ti_hi, tj_lo, tj_hi]), axis=0):
+            mask[max(a, 0):max(b, 0), max(c, 0):max(d, 0)] = True
+        return list(zip(*np.nonzero(mask)))
+
+    def _compute_tile(self, ti, tj):
+        rows = slice(ti * self.tile, (ti + 1) * self.tile)
+        cols = slice(tj * self.tile, (tj + 1) * self.tile)
+        points = np.column_stack([self.gx[rows, cols].ravel(), self.gy[rows, cols].ravel()])
+
+        # k nearest readings within the radius; misses come back as inf
+        d, idx = self.tree.query(points, k=self.k, distance_upper_bound=self.radius_m, workers=-1)
+        found = np.isfinite(d)
+        idx = np.where(found, idx, 0)
+        zz = np.where(found, self.z[idx], 0.0)
+        if self.method == "Simple Kriging":
+            est = self._simple_kriging(d, idx, found, zz)
+        else:
+            w = np.where(found, 1.0 / np.maximum(d, 1.0) ** self.power, 0.0)
+            wsum = w.sum(axis=1)
+            est = np.where(wsum > 0, (w * zz).sum(axis=1) / np.where(wsum > 0, wsum, 1), np.nan)
+        self.values[rows, cols] = est.reshape(self.gx[rows, cols].shape)
+
+    def _simple_kriging(self, d, idx, found, zz):
+        # Exponential covariance with the frozen mean and sill
+        mean, sill = self.krige_params
+        corr_len, nugget = self.radius_m / 3, 0.1 * sill
+        nb = self.xy[idx]
+        dnn = np.linalg.norm(nb[:, :, None, :] - nb[:, None, :, :], axis=-1)
+        pair = found[:, :, None] & found[:, None, :]
+        C = np.where(pair, sill * np.exp(-dnn / corr_len), 0.0)
+        diag = np.arange(self.k)
+        C[:, diag, diag] = sill + nugget  # also keeps padded slots solvable
+        c0 = np.where(found, sill * np.exp(-d / corr_len), 0.0)
+        w = np.linalg.solve(C, c0[..., None])[..., 0]
+        est = mean + (w * (zz - mean) * found).sum(axis=1)
+        return np.where(found.any(axis=1), est, np.nan)
+
+    def image_uri(self, vmin, vmax, colorscale="Viridis"):
+        """Surface as a transparent PNG data URI (re-encoded only when it changes)"""
+        key = (self.version, vmin, vmax, colorscale)
+        if self._image[0] == key:
+            return self._image[1]
+        lut = np.array([plotly.colors.unlabel_rgb(c) for c in
+                        plotly.colors.sample_colorscale(colorscale, np.linspace(0, 1, 256))], dtype=np.uint8)
+        level = np.clip((self.values - vmin) / max(vmax - vmin, 1e-6), 0, 1)
+        rgba = np.zeros(self.values.shape + (4,), dtype=np.uint8)
+        rgba[..., :3] = lut[(np.nan_to_num(level) * 255).astype(int)]
+        rgba[..., 3] = np.where(np.isfinite(self.values), 170, 0)
+        buf = io.BytesIO()
+        Image.fromarray(rgba[::-1], "RGBA").save(buf, format="PNG")  # north up
+        uri = "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+        self._image = (key, uri)
+        return uri
+
+
+def get_risk_surface(method):
+    # Cached per session so reruns only pay for tiles touched by new readings
+    surfaces = st.session_state.setdefault('risk_surfaces', {})
+    if method not in surfaces:
+        surfaces[method] = RiskSurface(method)
+    return surfaces[method]
+
+# ==============================================================================
+# 3.7 OFFLINE BASEMAP (LOCAL MBTILES ENDPOINT WITH LRU CACHE)
+# ==============================================================================
+
+TILE_MIME_TYPES = {"png": "image/png", "jpg": "image/jpeg", "jpeg": "image/jpeg",
+                   "webp": "image/webp", "pbf": "application/x-protobuf"}
+
+
+class MBTilesReader:
+    """Read-only MBTiles (SQLite) access with an in-memory LRU in front"""
+
+    def __init__(self, path, cache_size):
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self.lock = threading.Lock()
+        meta = dict(self.conn.execute("SELECT name, value FROM metadata").fetchall())
+        self.format = meta.get("format", "png")
+        self.get = functools.lru_cache(maxsize=cache_size)(self._read)
+
+    def _read(self, z, x, y):
+        # MBTiles stores rows in TMS order (y flipped)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (z, x, (1 << z) - 1 - y),
+            ).fetchone()
+        return row[0] if row else None
+
+
+# Deepest zoom any XYZ tile set uses; bounds 1 << z for requests from the network
+MAX_TILE_ZOOM = 22
+
+
+class TileRequestHandler(http.server.BaseHTTPRequestHandler):
+    reader = None
+
+    def do_GET(self):
+        try:
+            z, x, y = (int(p.split(".")[0]) for p in self.path.split("?")[0].strip("/").split("/"))
+        except ValueError:
+            self.send_error(404)
+            return
+        if not (0 <= z <= MAX_TILE_ZOOM and 0 <= x < (1 << z) and 0 <= y < (1 << z)):
+            self.send_error(404)
+            return
+        data = self.reader.get(z, x, y)
+        if data is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", TILE_MIME_TYPES.get(self.reader.format, "application/octet-stream"))
+        if self.reader.format == "pbf" and data[:2] == b"\x1f\x8b":
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "public, max-age=86400")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Tile requests would drown the Streamlit log
+
+
+@st.cache_resource
+def start_tile_server():
+    """Serve the MBTiles file on CONFIG["tile_port"]; None if unavailable"""
+    path = CONFIG["mbtiles_path"]
+    if not os.path.exists(path):
+        logger.warning("Offline basemap requested but %s does not exist (run prefetch_tiles.py)", path)
+        return None
+    handler = type("MBTilesHandler", (TileRequestHandler,), {"reader": MBTilesReader(path, CONFIG["tile_cache_size"])})
+    try:
+        server = http.server.ThreadingHTTPServer(("0.0.0.0", CONFIG["tile_port"]), handler)
+    except OSError as e:
+        logger.warning("Tile server could not bind port %s: %s", CONFIG["tile_port"], e)
+        return None
+    threading.Thread(target=server.serve_forever, name="tile-server", daemon=True).start()
+    return server
+
+
+def offline_basemap_active():
+    return CONFIG["basemap"] == "offline" and start_tile_server() is not None
+
+
+def basemap_mapbox():
+    """Mapbox style and base layers for Plotly maps: remote Carto or local tiles"""
+    if offline_basemap_active():
+        return {"style": "white-bg", "layers": [dict(
+            sourcetype="raster", source=[CONFIG["tile_url"]], below="traces",
+            sourceattribution="© OpenStreetMap contributors © CARTO",
+        )]}
+    return {"style": "carto-positron", "layers": []}
+
+# ==============================================================================
+# 3.8 PRESENTER / AUDIENCE SYNC (IN-PROCESS PUB/SUB)
+# ==============================================================================
+
+# Session objects that make up the live demo (shared by reference with followers, who only read them)
+LIVE_DEMO_KEYS = ("geo_data", "anomaly_detector", "risk_surfaces", "last_stream")
+
+# Tooltip on live-demo controls that followers see disabled
+FOLLOWER_READ_ONLY_HELP = "Following the presenter: live-demo controls are read-only."
+
+# Followers not seen for this long are dropped from the broadcast
+FOLLOWER_TIMEOUT_S = 10.0
+
+
+class SlideBroadcast:
+    """Presenter publishes (slide, demo state); followers compare versions on their next tick"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = 0
+        self.slide_index = 0
+        self.state = {}
+        self.revision = None
+        self.followers = {}
+        self.shared_builds = 0
+        self._pruned = time.monotonic()
+
+    def publish(self, slide_index, state, revision=None):
+        # `revision` catches in-place changes (e.g. recomputed surface tiles) that identity checks miss
+        with self.lock:
+            changed = slide_index != self.slide_index or revision != self.revision or any(
+                state.get(k) is not self.state.get(k) for k in set(state) | set(self.state))
+            if not changed:
+                return self.version
+            self.slide_index, self.state, self.revision = slide_index, dict(state), revision
+            self.version += 1
+            return self.version
+
+    def snapshot(self):
+        with self.lock:
+            return self.version, self.slide_index, dict(self.state)
+
+    def heartbeat(self, session_uid):
+        with self.lock:
+            now = time.monotonic()
+            self.followers[session_uid] = now
+            if now - self._pruned > FOLLOWER_TIMEOUT_S:
+                self._prune(now)
+
+    def follower_count(self):
+        with self.lock:
+            self._prune(time.monotonic())
+            return len(self.followers)
+
+    def _prune(self, now):
+        # Closed tabs never say goodbye; forget them once their heartbeat stops
+        self.followers = {uid: t for uid, t in self.followers.items() if now - t < FOLLOWER_TIMEOUT_S}
+        self._pruned = now
+
+
+@st.cache_resource
+def get_slide_broadcast():
+    return SlideBroadcast()
+
+
+@st.cache_resource(max_entries=32)
+def shared_render(key, _builder):
+    # Streamlit computes each key once even when many sessions ask at the same time
+    get_slide_broadcast().shared_builds += 1
+    return _builder()
+
+
+def is_follower():
+    # Followers hold the presenter's live-demo objects by reference, so they must not write to them
+    return st.session_state.get('role') == "Audience"
+
+
+def read_only_help():
+    return FOLLOWER_READ_ONLY_HELP if is_follower() else None
+
+
+def shared_or_local(name, builder):
+    """Followers of the same broadcast version share one build of a live figure"""
+    if is_follower():
+        return shared_render((name, st.session_state.seen_version), builder)
+    return builder()
+
+
+def publish_presenter_state():
+    state = {k: st.session_state[k] for k in LIVE_DEMO_KEYS if k in st.session_state}
+    surfaces = st.session_state.get('risk_surfaces', {})
+    revision = tuple(sorted((method, surface.version) for method, surface in surfaces.items()))
+    get_slide_broadcast().publish(st.session_state.slide_index, state, revision)
+
+
+def follow_presenter():
+    version, slide_index, state = get_slide_broadcast().snapshot()
+    st.session_state.seen_version = version
+    st.session_state.slide_index = slide_index
+    for k, v in state.items():
+        st.session_state[k] = v
+
+
+def stop_following():
+    """Leaving Audience: drop the presenter's objects so this session can never write to them"""
+    for k in LIVE_DEMO_KEYS + ("seen_version",):
+        st.session_state.pop(k, None)
+    init_session_state()
+
+
+@st.fragment(run_every=1.0)
+def audience_watcher():
+    # Only this tiny fragment runs each second (no blocking wait); the slide reruns only on a new version
+    broadcast = get_slide_broadcast()
+    broadcast.heartbeat(st.session_state.session_uid)
+    if broadcast.version != st.session_state.seen_version:
+        st.rerun()
+
 # ==============================================================================
 # 4. SLIDE CONTROLLERS (THE CONTENT)
 # ==============================================================================
@@ -302,9 +1423,7 @@ def slide_0_hero():
         """, unsafe_allow_html=True)
         
         st.markdown("<br><br>", unsafe_allow_html=True)
-        if st.button("🚀 BEGIN KEYNOTE PRESENTATION", use_container_width=True):
-            st.session_state.slide_index = 1
-            st.rerun()
+        st.button("🚀 BEGIN KEYNOTE PRESENTATION", use_container_width=True, on_click=go_to_slide, args=(1,))
 
     with c2:
         st.markdown("""
@@ -355,11 +1474,8 @@ def slide_1_problem_context():
     st.warning("How do we teach **IoT Hardware** to distance learners? We cannot ship 500 Arduino kits to 500 homes. It is logistically impossible.")
     st.markdown('</div>', unsafe_allow_html=True)
 
-def slide_2_solution_pipeline():
-    st.markdown('<div class="slide-card">', unsafe_allow_html=True)
-    render_header("2. The Solution: MICROCASA Pipeline")
-    st.markdown("**'Simulated-to-Strategic'**: A verified data lifecycle that removes the hardware dependency.")
-
+@st.cache_resource
+def build_pipeline_graph():
     graph = graphviz.Digraph()
     graph.attr(rankdir='LR', bgcolor='transparent')
     graph.attr('node', shape='rect', style='filled, rounded', fontname='Helvetica', penwidth='0', margin='0.2')
@@ -372,10 +1488,16 @@ def slide_2_solution_pipeline():
     graph.edge('1', '2', label=' Virtual Signals', color='#7f8c8d')
     graph.edge('2', '3', label=' JSON Payload', color='#7f8c8d')
     graph.edge('3', '4', label=' Decision Intel', color='#7f8c8d')
-    
+    return graph
+
+def slide_2_solution_pipeline():
+    st.markdown('<div class="slide-card">', unsafe_allow_html=True)
+    render_header("2. The Solution: MICROCASA Pipeline")
+    st.markdown("**'Simulated-to-Strategic'**: A verified data lifecycle that removes the hardware dependency.")
+
     col1, col2 = st.columns([2, 1])
     with col1:
-        st.graphviz_chart(graph, use_container_width=True)
+        st.graphviz_chart(build_pipeline_graph(), use_container_width=True)
     with col2:
         st.info("**Why this works:**\n\nBy simulating the sensor in Stage 1, we remove the 'Black Box' of data origin without the risk of fried circuits or driver incompatibility.")
 
@@ -394,7 +1516,19 @@ def slide_3_tech_1_wokwi():
         st.write("Wokwi allows students to write C++ code for an ESP32 microprocessor directly in the browser. They learn **logic**, not wiring.")
         st.markdown("**Student Task:** Program a DHT22 sensor to trigger an alert if Temperature > 30°C.")
         
-        if st.button("▶️ COMPILE & UPLOAD TO SIMULATOR"):
+        high_rate = st.toggle("⚡ High-Rate Ingest Mode", help="Stream readings at realistic sensor rates; the monitor redraws at a fixed frame rate.")
+        if high_rate:
+            ingest_hz = st.select_slider("Sensor Rate (Hz)", options=[10, 50, 100, 500, 1000, 2000, 5000], value=1000)
+            duration = st.slider("Stream Duration (s)", 2, 30, 10)
+            frame_hz = st.slider("Monitor Frame Rate (fps)", 2, 30, 10)
+            n_devices = st.slider("Virtual ESP32 Fleet", 1, 32, 8)
+            spike_rate = 0.001
+        else:
+            # Classic demo: 5 readings, one every 0.8 s
+            ingest_hz, duration, frame_hz = 1 / 0.8, 5 * 0.8, 10
+            n_devices, spike_rate = 1, 0.0
+
+        if st.button("▶️ COMPILE & UPLOAD TO SIMULATOR", disabled=is_follower(), help=read_only_help()):
             st.session_state.sensor_active = True
             st.session_state.simulation_log = []
             st.toast("Compiling C++ Code...", icon="⚙️")
@@ -411,59 +1545,23 @@ def slide_3_tech_1_wokwi():
 
     # Logic Loop
     if st.session_state.sensor_active:
-        logs = ["[BOOT] ESP32 Initialized...", "[WIFI] Connected!"]
-        
-        # We need a placeholder list to show "Live" table rows
-        live_rows = []
+        stream = TelemetryStream(detector=get_anomaly_detector())
+        stream.log("[BOOT] ESP32 Initialized...")
+        stream.log("[WIFI] Connected!")
 
-        for _ in range(5):
-            # 1. Generate Data
-            temp = round(random.uniform(25.0, 34.0), 1)
-            humid = round(random.uniform(50, 80), 1)
-            
-            # 2. Simulate Geospatial Tagging (USM Penang Area)
-            lat = round(5.35 + random.uniform(-0.01, 0.01), 4)
-            lon = round(100.30 + random.uniform(-0.01, 0.01), 4)
-            
-            status = "NORMAL" if temp < 30 else "ALERT!!"
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            
-            # 3. Add to Logs
-            logs.append(f"[{timestamp}] T:{temp}C H:{humid}% -> {status}")
-            
-            # 4. Add to Data Table (Visible Telemetry)
-            live_rows.append({"Time": timestamp, "Temp": temp, "Humid": humid, "Lat": lat, "Lon": lon})
-            
-            # 5. Add to Global Geo State for Heatmap later
-            new_row = pd.DataFrame([{"lat": lat, "lon": lon, "temp": temp, "humidity": humid, "time": datetime.now()}])
-            st.session_state.geo_data = pd.concat([st.session_state.geo_data, new_row], ignore_index=True)
-
-            # Render
-            log_html = "".join([f'<div class="terminal-line">{l}</div>' for l in logs])
-            with c2:
-                st.markdown(f'<div class="terminal-window">{log_html}<div class="terminal-line" style="animation: blink 1s infinite;">_</div></div>', unsafe_allow_html=True)
-            
-            with c3:
-                # Showing the raw data frame constructing in real-time
-                st.markdown(f"""
-                <div class="telemetry-panel">
-                <strong>REGISTER MAP:</strong><br>
-                Address: 0x3F<br>
-                Payload: JSON<br>
-                ----------------<br>
-                Temp: <span style="color:#e74c3c">{temp}</span><br>
-                Humid: <span style="color:#3498db">{humid}</span><br>
-                Geo: {lat}, {lon}
-                </div>
-                """, unsafe_allow_html=True)
-                
-            time.sleep(0.8) # Simulate processing delay
+        n_readings = max(int(round(ingest_hz * duration)), 1)
+        run_telemetry_stream(stream, log_container, data_table, ingest_hz, frame_hz, n_readings, n_devices, spike_rate)
             
+    elif st.session_state.get('last_stream') is not None:
+        stream = st.session_state.last_stream
+        if stream.finished:
+            # Keep showing the final frame of the last run (sliders etc. rerun the slide)
+            draw_stream_frame(stream, log_container, data_table)
+        else:
+            watch_live_stream(stream, log_container, data_table)  # The presenter's run, seen by a follower
     else:
-        with c2:
-            st.markdown('<div class="terminal-window"><div class="terminal-line">Waiting for upload...</div></div>', unsafe_allow_html=True)
-        with c3:
-            st.info("System Offline")
+        log_container.markdown('<div class="terminal-window"><div class="terminal-line">Waiting for upload...</div></div>', unsafe_allow_html=True)
+        data_table.info("System Offline")
 
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -514,7 +1612,7 @@ def slide_4_tech_2_appsheet():
         with st.form("mobile_sim"):
             val = st.number_input("Enter Temp (°C)", value=32.5)
             loc = st.text_input("Location", "Sector 7")
-            submitted = st.form_submit_button("Submit to Cloud")
+            submitted = st.form_submit_button("Submit to Cloud", disabled=is_follower(), help=read_only_help())
             
             if submitted:
                 if val > 50:
@@ -528,12 +1626,77 @@ def slide_4_tech_2_appsheet():
                     
                     # Update Map Data for Slide 6
                     new_row = pd.DataFrame([{"lat": lat, "lon": lon, "temp": val, "humidity": 60, "time": datetime.now()}])
+                    detector = get_anomaly_detector()  # Seeded from geo_data, so fetch it before appending
                     st.session_state.geo_data = pd.concat([st.session_state.geo_data, new_row], ignore_index=True)
+                    if dispatch_heat_alerts(new_row, location=loc):
+                        st.warning("🚨 Above 35 °C: alert queued for the Apps Script dispatcher.")
+                    z = detector.observe([val], [lat], [lon])
+                    if EwmaAnomalyDetector.is_anomaly(z).any():
+                        st.warning(f"⚠️ Anomalous for this cell (z={z[0]:+.1f}): flagged on the Looker heatmap.")
                     
                     # Mini Map Preview
-                    df_mini = pd.DataFrame({'lat': [lat], 'lon': [lon]})
-                    st.map(df_mini, zoom=14, size=50)
-                    
+                    if offline_basemap_active():
+                        basemap = basemap_mapbox()
+                        fig_mini = go.Figure(go.Scattermapbox(lat=[lat], lon=[lon], marker=dict(size=14, color="#c0392b")))
+                        fig_mini.update_layout(height=300, margin={"r": 0, "t": 0, "l": 0, "b": 0},
+                                               mapbox=dict(center=dict(lat=lat, lon=lon), zoom=14, **basemap))
+                        st.plotly_chart(fig_mini, use_container_width=True)
+                    else:
+                        df_mini = pd.DataFrame({'lat': [lat], 'lon': [lon]})
+                        st.map(df_mini, zoom=14, size=50)
+
+    st.markdown("---")
+    st.markdown("### 📥 Bulk Field Import")
+    st.write("Field teams hand us spreadsheets, not single entries. Upload a CSV/JSON export and the same constraint rules run across every row at once.")
+
+    uploaded = st.file_uploader("Upload field readings", type=["csv", "json", "jsonl"],
+                                help="Columns: lat, lon, temp (required); humidity, time, location (optional).")
+    result = None
+    if uploaded is not None:
+        try:
+            result = validate_field_readings(read_field_upload(uploaded))
+        except (ValueError, TypeError) as e:
+            st.error(f"Error: Could not parse {uploaded.name} ({e}).")
+
+    if result is not None:
+        accepted, rejected, summary = result
+
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Rows Received", f"{summary.attrs['total']:,}")
+        m2.metric("Accepted", f"{len(accepted):,}")
+        m3.metric("Rejected", f"{len(rejected):,}")
+
+        s1, s2 = st.columns([1.5, 1])
+        with s1:
+            st.dataframe(summary, hide_index=True, use_container_width=True)
+        with s2:
+            st.download_button(
+                "⬇️ Download Rejected Rows",
+                rejected.to_csv(index=False).encode("utf-8"),
+                file_name=f"rejected_{uploaded.name.rsplit('.', 1)[0]}.csv",
+                mime="text/csv",
+                disabled=rejected.empty,
+                use_container_width=True,
+            )
+
+            # Guard against appending the same upload twice
+            imported = st.session_state.setdefault('imported_uploads', set())
+            already = uploaded.file_id in imported
+            if st.button(f"☁️ Sync {len(accepted):,} Accepted Rows", disabled=accepted.empty or already or is_follower(), use_container_width=True):
+                detector = get_anomaly_detector()  # Seeded from geo_data, so fetch it before appending
+                st.session_state.geo_data = pd.concat([st.session_state.geo_data, accepted], ignore_index=True)
+                z = detector.observe(accepted["temp"].to_numpy(), accepted["lat"].to_numpy(), accepted["lon"].to_numpy())
+                n_anomalies = int(EwmaAnomalyDetector.is_anomaly(z).sum())
+                if n_anomalies:
+                    st.warning(f"⚠️ {n_anomalies:,} readings flagged as anomalous for their cell.")
+                imported.add(uploaded.file_id)
+                st.success(f"✅ {len(accepted):,} readings appended to the strategic dashboard.")
+                n_alerts = dispatch_heat_alerts(accepted)
+                if n_alerts:
+                    st.warning(f"🚨 {n_alerts:,} readings above 35 °C queued for the alert dispatcher.")
+            elif already:
+                st.caption("This file has already been synced.")
+
     st.markdown('</div>', unsafe_allow_html=True)
 
 def slide_5_tech_3_gas():
@@ -581,8 +1744,94 @@ function doPost(e) {
         """, language="javascript")
         
     st.info("💡 **Key Finding:** By writing this code, students realized that 'Data' is fluid, not static.")
+
+    st.markdown("---")
+    st.markdown("### 📬 Live Alert Dispatcher")
+    st.write("One email per reading floods the inbox at any real data rate. Here alerts pass through a queue that deduplicates per location, rate-limits with a token bucket and folds repeats into periodic digests.")
+
+    dispatcher = get_alert_dispatcher()
+
+    b1, b2, _ = st.columns([1, 1, 2])
+    with b1:
+        if st.button("🔥 Simulate Heat-Wave Burst (500 readings)", use_container_width=True):
+            burst = pd.DataFrame({
+                "lat": 5.355 + np.random.choice([-0.004, -0.002, 0.0, 0.002, 0.004], 500),
+                "lon": 100.30 + np.random.choice([-0.004, 0.0, 0.004], 500),
+                "temp": np.round(np.random.uniform(35.5, 42.0, 500), 1),
+            })
+            dispatch_heat_alerts(burst)
+    with b2:
+        if st.button("📨 Send Digest Now", use_container_width=True):
+            dispatcher.flush_digest()
+
+    render_dispatcher_metrics(dispatcher)
+
     st.markdown('</div>', unsafe_allow_html=True)
 
+
+@st.fragment(run_every=1.0)
+def render_dispatcher_metrics(dispatcher):
+    # The dispatcher drains on its own thread; refresh its counters instead of waiting for it
+    stats = dispatcher.stats()
+    m = st.columns(6)
+    m[0].metric("Queue Depth", stats["queue_depth"])
+    m[1].metric("Received", f"{stats['received']:,}")
+    m[2].metric("Delivered", f"{stats['delivered']:,}")
+    m[3].metric("Deduplicated", f"{stats['deduplicated']:,}")
+    m[4].metric("Rate-Limited", f"{stats['rate_limited']:,}")
+    m[5].metric("Latency p95", f"{stats['latency_p95_ms']:,.0f} ms")
+    st.caption(f"Sink: {dispatcher.sink.name} · Digests sent: {stats['digests']} · Awaiting digest: {stats['pending_digest']:,} · Failed: {stats['failed']} · Dropped: {stats['dropped']}")
+
+    if dispatcher.outbox:
+        st.dataframe(pd.DataFrame(list(dispatcher.outbox), columns=["Sent", "Subject"]), hide_index=True, use_container_width=True)
+
+def build_heatmap_figure(df_vis, recent, basemap):
+    # INTERACTIVE HEATMAP (Plotly Mapbox)
+    fig_map = px.density_mapbox(
+        df_vis, 
+        lat='lat', 
+        lon='lon', 
+        z='temp', 
+        radius=20,
+        center=dict(lat=5.356, lon=100.30), 
+        zoom=14,
+        mapbox_style=basemap["style"],
+        title="Real-Time Sensor Density Heatmap",
+        color_continuous_scale="Viridis"
+    )
+    if not recent.empty:
+        fig_map.add_trace(go.Scattermapbox(
+            lat=recent["lat"], lon=recent["lon"], mode="markers", name="Anomaly (|z| > 3)",
+            marker=dict(size=14, color="#e74c3c"),
+            text=[f"{t:.1f} °C · z={z:+.1f}" for t, z in zip(recent["temp"], recent["z"])],
+        ))
+    fig_map.update_layout(height=500, margin={"r":0,"t":40,"l":0,"b":0}, mapbox_layers=basemap["layers"])
+    return fig_map
+
+def build_trend_figure(df_vis):
+    # Standard Line Chart
+    fig = px.line(df_vis, y='temp', title="Incoming Data Stream", markers=True)
+    fig.add_hline(y=35, line_dash="dash", line_color="red", annotation_text="Critical Threshold")
+    return fig
+
+def build_surface_figure(df_vis, surface, basemap):
+    vmin, vmax = float(df_vis["temp"].quantile(0.02)), float(df_vis["temp"].quantile(0.98))
+    lat_min, lat_max, lon_min, lon_max = CAMPUS_GRID_BOUNDS
+    fig_surface = go.Figure(go.Scattermapbox(
+        lat=df_vis["lat"], lon=df_vis["lon"], mode="markers", name="Sensors",
+        marker=dict(size=6, color=df_vis["temp"], colorscale="Viridis", cmin=vmin, cmax=vmax,
+                    colorbar=dict(title="°C")),
+    ))
+    fig_surface.update_layout(
+        height=500, margin={"r": 0, "t": 10, "l": 0, "b": 0},
+        mapbox=dict(
+            style=basemap["style"], center=dict(lat=5.356, lon=100.30), zoom=14,
+            layers=basemap["layers"] + [dict(sourcetype="image", source=surface.image_uri(vmin, vmax), below="traces",
+                         coordinates=[[lon_min, lat_max], [lon_max, lat_max], [lon_max, lat_min], [lon_min, lat_min]])],
+        ),
+    )
+    return fig_surface
+
 def slide_6_tech_4_looker():
     st.markdown('<div class="slide-card">', unsafe_allow_html=True)
     render_header("6. Technology Deep Dive: Looker Studio (Strategy)")
@@ -591,38 +1840,94 @@ def slide_6_tech_4_looker():
     
     # Use Session State Data (generated from Slide 3 and 4 interactions)
     df_vis = st.session_state.geo_data
+    basemap = basemap_mapbox()
     
     # Interactive Tabs
-    tab1, tab2 = st.tabs(["🔥 Interactive Geospatial Heatmap", "📉 Temporal Trend"])
+    tab1, tab2, tab3 = st.tabs(["🔥 Interactive Geospatial Heatmap", "📉 Temporal Trend", "🌡️ Interpolated Risk Surface"])
     
     with tab1:
         st.markdown("### 🗺️ Risk Density Map (USM Campus)")
         st.caption("Interactive Heatmap: Visualizing high-temperature clusters reported by student sensors.")
         
-        # INTERACTIVE HEATMAP (Plotly Mapbox)
-        fig_map = px.density_mapbox(
-            df_vis, 
-            lat='lat', 
-            lon='lon', 
-            z='temp', 
-            radius=20,
-            center=dict(lat=5.356, lon=100.30), 
-            zoom=14,
-            mapbox_style="carto-positron",
-            title="Real-Time Sensor Density Heatmap",
-            color_continuous_scale="Viridis"
-        )
-        fig_map.update_layout(height=500, margin={"r":0,"t":40,"l":0,"b":0})
+        # Live anomaly flags from the streaming EWMA detector
+        recent = pd.DataFrame(list(get_anomaly_detector().recent), columns=["lat", "lon", "temp", "z", "time"])
+        fig_map = shared_or_local("heatmap", lambda: build_heatmap_figure(df_vis, recent, basemap))
         st.plotly_chart(fig_map, use_container_width=True)
+        st.caption(f"🔴 {len(recent):,} recent anomalies flagged by per-cell / per-device EWMA z-scores.")
         
     with tab2:
-        # Standard Line Chart
-        fig = px.line(df_vis, y='temp', title="Incoming Data Stream", markers=True)
-        fig.add_hline(y=35, line_dash="dash", line_color="red", annotation_text="Critical Threshold")
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(shared_or_local("trend", lambda: build_trend_figure(df_vis)), use_container_width=True)
+
+    with tab3:
+        st.markdown("### 🌡️ Estimated Temperature Between Sensors")
+        st.caption("Density shows where readings are; this surface estimates the temperature itself across the campus grid.")
+        method = st.radio("Interpolation", ["IDW", "Simple Kriging"], horizontal=True)
+
+        if is_follower():
+            # Read-only view of the presenter's surface; their rerun recomputes it and bumps the broadcast
+            surface = st.session_state.get('risk_surfaces', {}).get(method)
+            if surface is None:
+                st.info(f"The presenter has not opened the {method} surface yet.")
+            else:
+                def build_follower_surface():
+                    with surface.lock:
+                        return build_surface_figure(df_vis, surface, basemap)
+                st.plotly_chart(shared_or_local(f"surface-{method}", build_follower_surface), use_container_width=True)
+                st.caption(f"{method} · k={surface.k} neighbours within {surface.radius_m:.0f} m · presenter's surface")
+        else:
+            surface = get_risk_surface(method)
+            t_start = time.perf_counter()
+            surface.update(df_vis)
+            elapsed_ms = (time.perf_counter() - t_start) * 1000
+
+            st.plotly_chart(build_surface_figure(df_vis, surface, basemap), use_container_width=True)
+            n_tiles = surface.n_tiles[0] * surface.n_tiles[1]
+            st.caption(f"{method} · k={surface.k} neighbours within {surface.radius_m:.0f} m · "
+                       f"recomputed {surface.tiles_recomputed} of {n_tiles} tiles this rerun ({elapsed_ms:.0f} ms)")
+
+    with st.expander("📤 Export Telemetry for Looker Studio / QGIS"):
+        e1, e2 = st.columns(2)
+        with e1:
+            fmt = st.radio("Format", list(EXPORT_FORMATS), horizontal=True)
+            compress = st.checkbox("Gzip compress", value=True)
+            times = pd.to_datetime(df_vis["time"])
+            t0, t1 = times.min().to_pydatetime(), times.max().to_pydatetime()
+            time_range = None
+            if t1 > t0:
+                time_range = st.slider("Time Range", min_value=t0, max_value=t1, value=(t0, t1),
+                                       step=timedelta(seconds=1), format="DD/MM HH:mm:ss")
+        with e2:
+            st.caption("Bounding Box (WGS84)")
+            b1, b2 = st.columns(2)
+            lat_min = b1.number_input("Lat min", value=float(np.floor(df_vis["lat"].min() * 1e4) / 1e4), format="%.4f")
+            lat_max = b2.number_input("Lat max", value=float(np.ceil(df_vis["lat"].max() * 1e4) / 1e4), format="%.4f")
+            lon_min = b1.number_input("Lon min", value=float(np.floor(df_vis["lon"].min() * 1e4) / 1e4), format="%.4f")
+            lon_max = b2.number_input("Lon max", value=float(np.ceil(df_vis["lon"].max() * 1e4) / 1e4), format="%.4f")
+        bbox = (lat_min, lat_max, lon_min, lon_max)
+
+        n_rows = int(telemetry_filter_mask(df_vis, time_range, bbox).sum())
+        ext, mime = EXPORT_FORMATS[fmt]
+        st.download_button(
+            f"⬇️ Download {n_rows:,} Readings ({fmt})",
+            # Generated on click, in chunks of EXPORT_CHUNK_ROWS rows
+            data=lambda: build_telemetry_export(df_vis, fmt, time_range, bbox, compress),
+            file_name=f"microcasa_telemetry_{datetime.now():%Y%m%d_%H%M}.{ext}" + (".gz" if compress else ""),
+            mime="application/gzip" if compress else mime,
+            disabled=n_rows == 0,
+        )
+        st.caption("The finished file is held in server memory until downloaded; keep gzip on for large exports.")
 
     st.markdown('</div>', unsafe_allow_html=True)
 
+@st.cache_resource
+def build_entry_profile_figure():
+    # Donut Chart
+    df_demo = pd.DataFrame({
+        'Category': ['Science Bg (Strong)', 'Coding Exp (Weak)', 'Dashboard Exp (Weak)'],
+        'Value': [88, 25, 37] # Inverted values for visual
+    })
+    return px.bar(df_demo, x='Value', y='Category', orientation='h', color='Value', title="Entry Profile Competency (%)", range_x=[0,100])
+
 def slide_7_methodology():
     st.markdown('<div class="slide-card">', unsafe_allow_html=True)
     render_header("7. Methodology & Cohort Profile")
@@ -643,22 +1948,12 @@ def slide_7_methodology():
         
     with c2:
         st.markdown("### Digital Deficiencies at Baseline")
-        # Donut Chart
-        df_demo = pd.DataFrame({
-            'Category': ['Science Bg (Strong)', 'Coding Exp (Weak)', 'Dashboard Exp (Weak)'],
-            'Value': [88, 25, 37] # Inverted values for visual
-        })
-        fig = px.bar(df_demo, x='Value', y='Category', orientation='h', color='Value', title="Entry Profile Competency (%)", range_x=[0,100])
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_entry_profile_figure(), use_container_width=True)
 
     st.markdown('</div>', unsafe_allow_html=True)
 
-def slide_8_results_overview():
-    st.markdown('<div class="slide-card">', unsafe_allow_html=True)
-    render_header("8. Quantitative Findings: The 'Big' Numbers")
-    
-    st.markdown("### Aggregated Domain Competency Gains")
-    
+@st.cache_resource
+def build_domain_gains_figure():
     df_res = ResearchData.aggregated_domains()
     
     # 3D Bar Chart Effect
@@ -667,7 +1962,14 @@ def slide_8_results_overview():
         go.Bar(name='Post-Test', x=df_res['Domain'], y=df_res['Post_Mean'], marker_color='#c0392b')
     ])
     fig.update_layout(barmode='group', title="Mean Likert Scores (1-5)", height=500, template="plotly_white")
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+def slide_8_results_overview():
+    st.markdown('<div class="slide-card">', unsafe_allow_html=True)
+    render_header("8. Quantitative Findings: The 'Big' Numbers")
+    
+    st.markdown("### Aggregated Domain Competency Gains")
+    st.plotly_chart(build_domain_gains_figure(), use_container_width=True)
     
     # Key Metrics Row
     c1, c2, c3 = st.columns(3)
@@ -677,23 +1979,27 @@ def slide_8_results_overview():
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+@st.cache_resource
+def build_knowledge_gain_figure():
+    df_items = ResearchData.knowledge_items()
+
+    # Funnel or Bar Chart
+    fig = px.bar(df_items, y='Item', x='Gain', orientation='h', 
+                 text='Gain', color='Gain', color_continuous_scale='Reds',
+                 title="Net Gain per Technical Topic (Max +2.00)")
+    fig.update_layout(yaxis={'categoryorder':'total ascending'}, height=500)
+    return fig
+
 def slide_9_deep_dive_results():
     st.markdown('<div class="slide-card">', unsafe_allow_html=True)
     render_header("9. Deep Dive: The 'Aha!' Moment")
     
     st.write("Where did the growth come from? **The Bridge Technologies.**")
     
-    df_items = ResearchData.knowledge_items()
-    
     c1, c2 = st.columns([2, 1])
     
     with c1:
-        # Funnel or Bar Chart
-        fig = px.bar(df_items, y='Item', x='Gain', orientation='h', 
-                     text='Gain', color='Gain', color_continuous_scale='Reds',
-                     title="Net Gain per Technical Topic (Max +2.00)")
-        fig.update_layout(yaxis={'categoryorder':'total ascending'}, height=500)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_knowledge_gain_figure(), use_container_width=True)
         
     with c2:
         st.markdown("### Key Insight")
@@ -707,13 +2013,10 @@ def slide_9_deep_dive_results():
 
     st.markdown('</div>', unsafe_allow_html=True)
 
-def slide_10_trajectories():
-    st.markdown('<div class="slide-card">', unsafe_allow_html=True)
-    render_header("10. The Managerial Shift: Trajectories")
-    
-    st.markdown("The ultimate goal: Shifting identity from **Passive Inspector** to **Proactive System Architect**.")
-    
+@st.cache_resource
+def build_trajectories_figure():
     df_traj = ResearchData.individual_trajectories()
+
     
     # Parallel Coordinates Plot simulated via Line Chart
     fig = go.Figure()
@@ -737,8 +2040,15 @@ def slide_10_trajectories():
         height=500,
         showlegend=True
     )
+    return fig
+
+def slide_10_trajectories():
+    st.markdown('<div class="slide-card">', unsafe_allow_html=True)
+    render_header("10. The Managerial Shift: Trajectories")
     
-    st.plotly_chart(fig, use_container_width=True)
+    st.markdown("The ultimate goal: Shifting identity from **Passive Inspector** to **Proactive System Architect**.")
+    
+    st.plotly_chart(build_trajectories_figure(), use_container_width=True)
     st.success("✅ **Result:** 100% of the cohort showed an upward trajectory. No student was left behind.")
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -820,60 +2130,112 @@ slides = [
     slide_12_conclusion
 ]
 
-# Sidebar Navigation (Auto-Synced)
-with st.sidebar:
-    st.markdown("## MICROCASA 2026")
-    st.markdown("---")
-    
-    # Create a mapping of names
-    slide_names = [
-        "0. Start",
-        "1. The Context",
-        "2. The Solution",
-        "3. Tech: Wokwi",
-        "4. Tech: AppSheet",
-        "5. Tech: Apps Script",
-        "6. Tech: Looker",
-        "7. Methodology",
-        "8. Quant Results",
-        "9. Deep Dive",
-        "10. Trajectories",
-        "11. Qualitative",
-        "12. Conclusion"
-    ]
-    
-    selected_slide_name = st.radio(
-        "Navigate Slides:", 
-        slide_names, 
-        index=st.session_state.slide_index
+# Display Names (slide picker and static export)
+slide_names = [
+    "0. Start",
+    "1. The Context",
+    "2. The Solution",
+    "3. Tech: Wokwi",
+    "4. Tech: AppSheet",
+    "5. Tech: Apps Script",
+    "6. Tech: Looker",
+    "7. Methodology",
+    "8. Quant Results",
+    "9. Deep Dive",
+    "10. Trajectories",
+    "11. Qualitative",
+    "12. Conclusion"
+]
+
+def go_to_slide(index):
+    # Runs as a widget callback, before the rerun it triggers, so no st.rerun() is needed
+    st.session_state.slide_index = index
+
+
+@st.fragment
+def slide_router(role):
+    """Active slide plus its bottom navigation; clicks in here rerun only this fragment"""
+    started = time.perf_counter()
+
+    # Followers switch slides before the presenter's slide has finished rendering
+    if role == "Presenter":
+        publish_presenter_state()
+
+    current_slide_func = slides[st.session_state.slide_index]
+    current_slide_func()
+
+    if role == "Presenter":
+        publish_presenter_state()  # Live-demo state changed by the slide (new readings etc.)
+
+    # Bottom Navigation Buttons
+    st.markdown("<br>", unsafe_allow_html=True)
+    col_prev, col_progress, col_next = st.columns([1, 4, 1])
+    index = st.session_state.slide_index
+
+    with col_prev:
+        if index > 0 and role != "Audience":
+            st.button("⬅️ PREVIOUS", use_container_width=True, on_click=go_to_slide, args=(index - 1,))
+
+    with col_progress:
+        # The picker lives in the fragment so it is redrawn (and in sync) after every slide change
+        st.session_state.nav_slide = index
+        st.selectbox(
+            "Navigate Slides:",
+            range(len(slides)),
+            format_func=slide_names.__getitem__,
+            key="nav_slide",
+            on_change=lambda: go_to_slide(st.session_state.nav_slide),
+            disabled=role == "Audience",
+            label_visibility="collapsed",
+        )
+        st.progress((index + 1) / len(slides))
+
+    with col_next:
+        if index < len(slides) - 1 and role != "Audience":
+            st.button("NEXT ➡️", use_container_width=True, on_click=go_to_slide, args=(index + 1,))
+
+    logger.debug("slide %d rendered in %.1f ms", index, (time.perf_counter() - started) * 1000)
+
+
+def main():
+    st.set_page_config(
+        page_title="MICROCASA 2026: Ultra Edition",
+        page_icon="📡",
+        layout="wide",
+        initial_sidebar_state="collapsed"
     )
-    
-    # Update state if sidebar is clicked
-    new_index = slide_names.index(selected_slide_name)
-    if new_index != st.session_state.slide_index:
-        st.session_state.slide_index = new_index
-        st.rerun()
-    
-    st.markdown("---")
-    st.progress((st.session_state.slide_index + 1) / len(slides))
-    st.caption("Universiti Sains Malaysia © 2026")
-
-# Render Active Slide
-current_slide_func = slides[st.session_state.slide_index]
-current_slide_func()
-
-# Bottom Navigation Buttons
-st.markdown("<br>", unsafe_allow_html=True)
-col_prev, col_spacer, col_next = st.columns([1, 4, 1])
-
-with col_prev:
-    if st.session_state.slide_index > 0:
-        if st.button("⬅️ PREVIOUS", use_container_width=True):
-            st.session_state.slide_index -= 1
-            st.rerun()
-
-with col_next:
-    if st.session_state.slide_index < len(slides) - 1:
-        if st.button("NEXT ➡️", use_container_width=True):
-            st.session_state.slide_index += 1
-            st.rerun()
+    init_session_state()
+    inject_custom_css()
+
+    # Sidebar: Session Mode & Credits
+    with st.sidebar:
+        st.markdown("## MICROCASA 2026")
+        st.markdown("---")
+
+        # Presenter / Audience Sync
+        role = st.radio("Session Mode:", ["Solo", "Presenter", "Audience"], horizontal=True, key="role")
+        if role == "Presenter" and CONFIG["presenter_key"]:
+            if st.text_input("Presenter Key", type="password") != CONFIG["presenter_key"]:
+                st.error("Enter the presenter key to broadcast.")
+                role = "Solo"
+        if role == "Audience":
+            follow_presenter()
+            st.caption(f"📡 Following the presenter (broadcast v{st.session_state.seen_version})")
+        elif 'seen_version' in st.session_state:
+            stop_following()  # Switched away from Audience (or a rejected Presenter key)
+        if role == "Presenter":
+            broadcast = get_slide_broadcast()
+            st.caption(f"📡 Broadcasting v{broadcast.version} to {broadcast.follower_count()} followers · "
+                       f"{broadcast.shared_builds} shared renders")
+        st.markdown("---")
+        st.caption("Universiti Sains Malaysia © 2026")
+
+    # Render Active Slide (navigation reruns only the router, not the chrome above)
+    slide_router(role)
+
+    if role == "Audience":
+        audience_watcher()
+
+
+if __name__ == "__main__":
+    main()
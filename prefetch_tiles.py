@@ -0,0 +1,91 @@
+"""Pre-fetch basemap tiles for the USM Penang area into an MBTiles file.
+
+Run once while online, then start the deck with MICROCASA_BASEMAP=offline:
+
+    python prefetch_tiles.py --out tiles/usm_penang.mbtiles
+"""
+import argparse
+import math
+import os
+import sqlite3
+import time
+import urllib.request
+
+# Same light Carto style as the online "carto-positron" basemap
+DEFAULT_URL = "https://a.basemaps.cartocdn.com/light_all/{z}/{x}/{y}.png"
+
+# (lat_min, lat_max, lon_min, lon_max): USM campus plus the surrounding Penang island
+DEFAULT_BOUNDS = (5.30, 5.42, 100.24, 100.34)
+
+
+def lonlat_to_tile(lon, lat, z):
+    n = 1 << z
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_range(bounds, z):
+    lat_min, lat_max, lon_min, lon_max = bounds
+    x0, y0 = lonlat_to_tile(lon_min, lat_max, z)
+    x1, y1 = lonlat_to_tile(lon_max, lat_min, z)
+    for x in range(x0, x1 + 1):
+        for y in range(y0, y1 + 1):
+            yield x, y
+
+
+def open_mbtiles(path, bounds, fmt):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+        CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row);
+    """)
+    lat_min, lat_max, lon_min, lon_max = bounds
+    conn.executemany("INSERT OR REPLACE INTO metadata VALUES (?, ?)", [
+        ("name", "MICROCASA USM Penang"),
+        ("type", "baselayer"),
+        ("format", fmt),
+        ("bounds", f"{lon_min},{lat_min},{lon_max},{lat_max}"),
+        ("attribution", "© OpenStreetMap contributors © CARTO"),
+    ])
+    return conn
+
+
+def prefetch(out, url, bounds, zooms, delay):
+    conn = open_mbtiles(out, bounds, url.rsplit(".", 1)[-1])
+    for z in zooms:
+        fetched = skipped = 0
+        for x, y in tile_range(bounds, z):
+            tms_y = (1 << z) - 1 - y
+            exists = conn.execute("SELECT 1 FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                                  (z, x, tms_y)).fetchone()
+            if exists:
+                skipped += 1
+                continue
+            req = urllib.request.Request(url.format(z=z, x=x, y=y), headers={"User-Agent": "microcasa-prefetch/1.0"})
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                conn.execute("INSERT INTO tiles VALUES (?, ?, ?, ?)", (z, x, tms_y, resp.read()))
+            fetched += 1
+            time.sleep(delay)  # Be polite to the tile provider
+        conn.commit()
+        print(f"zoom {z}: {fetched} fetched, {skipped} already cached")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default="tiles/usm_penang.mbtiles")
+    parser.add_argument("--url", default=DEFAULT_URL, help="XYZ tile URL template")
+    parser.add_argument("--bounds", type=float, nargs=4, default=DEFAULT_BOUNDS,
+                        metavar=("LAT_MIN", "LAT_MAX", "LON_MIN", "LON_MAX"))
+    parser.add_argument("--min-zoom", type=int, default=12)
+    parser.add_argument("--max-zoom", type=int, default=17)
+    parser.add_argument("--delay", type=float, default=0.05, help="Seconds between requests")
+    args = parser.parse_args()
+    prefetch(args.out, args.url, tuple(args.bounds), range(args.min_zoom, args.max_zoom + 1), args.delay)
+
+
+if __name__ == "__main__":
+    main()